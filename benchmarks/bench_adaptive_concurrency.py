@@ -0,0 +1,124 @@
+"""
+用本地模拟服务器验证 AIMDController：服务器同时处理的请求超过 capacity 个时返回 429，
+负载越高响应越慢。分别用固定的低并发、固定的高并发和自适应并发发同样多的请求，
+比较耗时、被限流次数和并发窗口的变化。
+
+用法：
+    python benchmarks/bench_adaptive_concurrency.py                  # 默认 capacity=8，400 个请求
+    python benchmarks/bench_adaptive_concurrency.py -c 4 -r 200      # 更容易被限流的服务器
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_client import HTTPClient, AIMDController
+
+
+class ThrottlingServer(ThreadingHTTPServer):
+    """同时处理的请求超过 capacity 个就返回 429，否则延迟随负载变长"""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, capacity, latency):
+        super().__init__(("127.0.0.1", 0), ThrottlingHandler)
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            active = server.active
+            if active > server.capacity:
+                server.throttled += 1
+        try:
+            if active > server.capacity:
+                self.reply(429, b"slow down")
+            else:
+                time.sleep(server.latency * (1 + active / server.capacity))
+                self.reply(200, b"ok")
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(url, requests_count, threads, controller):
+    """用 threads 个线程发 requests_count 个请求，返回 (秒数, 失败次数, 窗口采样)"""
+    # 熔断器阈值调得很高，只比较并发控制本身
+    client = HTTPClient(timeout=10, retries=8, backoff=0.02, max_backoff=1.0, breaker_threshold=10 ** 6,
+                        pool_size=threads, controller=controller)
+    windows = []
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.05):
+            windows.append(controller.window)
+
+    if controller:
+        threading.Thread(target=sample, daemon=True).start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        statuses = list(executor.map(lambda i: client.get(f"{url}/{i}").status_code, range(requests_count)))
+    seconds = time.perf_counter() - start
+    done.set()
+    client.close()
+    return seconds, sum(status != 200 for status in statuses), windows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIMDController 在模拟限流服务器上的表现")
+    parser.add_argument("-c", "--capacity", type=int, default=8, help="服务器同时处理请求数的上限")
+    parser.add_argument("-l", "--latency", type=float, default=0.02, help="空闲时每个请求的延迟（秒）")
+    parser.add_argument("-r", "--requests", type=int, default=400, help="每种方式发多少个请求")
+    parser.add_argument("-t", "--threads", type=int, default=32, help="客户端线程数，也是并发窗口的上限")
+    args = parser.parse_args()
+
+    server = ThrottlingServer(args.capacity, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"模拟服务器：最多同时处理 {args.capacity} 个请求，空闲延迟 {args.latency * 1000:.0f} 毫秒，"
+          f"每种方式 {args.requests} 个请求")
+
+    cases = [
+        ("固定并发 2", 2, None),
+        (f"固定并发 {args.threads}", args.threads, None),
+        (f"自适应（上限 {args.threads}）", args.threads, AIMDController(initial=4, max_window=args.threads)),
+    ]
+    for label, threads, controller in cases:
+        server.throttled = 0
+        seconds, failed, windows = run(url, args.requests, threads, controller)
+        line = (f"  {label:<16} {seconds:6.2f} 秒，{args.requests / seconds:7.1f} 个/秒，"
+                f"被限流 {server.throttled} 次，最终失败 {failed} 个")
+        if windows:
+            line += (f"，窗口 平均 {statistics.mean(windows):.1f} / 最大 {max(windows):.1f}"
+                     f" / 最后 {windows[-1]:.1f}")
+        print(line)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+对比 generate.main 式的逐格写入和批量写入：把 french_verbs_conjugations.csv 的全部内容
+重新写进一个新的 CSV，批量写入实测全程；逐格写入只实测前若干次，再按总写入次数估算。
+
+用法：python benchmarks/bench_batch_write.py [逐格写入的实测次数]
+"""
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_attribute_manager import CSVAttributeManager
+
+REPERTOIRE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "french_verbs_conjugations.csv")
+
+
+def ingest(manager, source, limit=None):
+    """按 generate.main 的方式逐个属性写入，返回写入次数"""
+    writes = 0
+    for element in source.elements:
+        for attr in source.attributes:
+            manager.write_attribute(element, attr, source.read_attribute(element, attr))
+            writes += 1
+            if limit is not None and writes >= limit:
+                return writes
+    return writes
+
+
+def main():
+    sample = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    source = CSVAttributeManager(REPERTOIRE_CSV)
+    total_writes = len(source.elements) * len(source.attributes)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # 批量写入：全部写完只保存一次
+        manager = CSVAttributeManager(os.path.join(tmp_dir, "batch.csv"))
+        start = time.perf_counter()
+        with manager.batch():
+            ingest(manager, source)
+        batch_seconds = time.perf_counter() - start
+
+        # 逐格写入：在已经是完整大小的表上实测，每次写入都会重写整个文件
+        full_csv = os.path.join(tmp_dir, "unbatched.csv")
+        shutil.copyfile(REPERTOIRE_CSV, full_csv)
+        manager = CSVAttributeManager(full_csv)
+        start = time.perf_counter()
+        writes = ingest(manager, source, limit=sample)
+        per_write = (time.perf_counter() - start) / writes
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print(f"表格大小：{len(source.elements)} 行 × {len(source.attributes)} 列，共 {total_writes} 次写入")
+    print(f"批量写入：{batch_seconds:.2f} 秒")
+    print(f"逐格写入：每次 {per_write * 1000:.1f} 毫秒，估计共 {per_write * total_writes / 3600:.1f} 小时")
+
+
+if __name__ == "__main__":
+    main()
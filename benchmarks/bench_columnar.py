@@ -0,0 +1,62 @@
+"""
+对比旧的字典套字典布局和现在的按列存储：加载时间和加载后常驻内存（tracemalloc 统计）。
+
+用法：python benchmarks/bench_columnar.py
+"""
+import os
+import sys
+import csv
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from csv_attribute_manager import CSVAttributeManager
+
+CSV_FILES = ["french_verbs_conjugations.csv", "conjugations_to_anki.csv"]
+
+
+def load_dict_of_dicts(csv_file):
+    """旧版 _load_data 的布局：每个元素一个字典"""
+    with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    attributes = rows[0][1:]
+    elements = []
+    data = {}
+    for row in rows[1:]:
+        if row:
+            element = row[0]
+            elements.append(element)
+            data[element] = {}
+            for i, attr_value in enumerate(row[1:]):
+                if i < len(attributes):
+                    data[element][attributes[i]] = attr_value
+    return elements, attributes, data
+
+
+def measure(loader, csv_file):
+    """返回 (加载秒数, 加载后常驻内存 MB, 加载过程峰值内存 MB)"""
+    start = time.perf_counter()
+    loader(csv_file)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = loader(csv_file)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds, current / 1024 / 1024, peak / 1024 / 1024
+
+
+def main():
+    for name in CSV_FILES:
+        csv_file = os.path.join(ROOT, name)
+        print(name)
+        for label, loader in [("字典套字典", load_dict_of_dicts), ("按列存储", CSVAttributeManager)]:
+            seconds, current, peak = measure(loader, csv_file)
+            print(f"  {label}：加载 {seconds:.3f} 秒，常驻 {current:.1f} MB，峰值 {peak:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
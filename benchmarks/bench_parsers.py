@@ -0,0 +1,147 @@
+"""
+比较 extract_verb_conjugation 各个解析器：先检查在所有保存下来的网页上结果是否和 html.parser 完全相同，
+再测每个解析器每秒能解析多少个网页，以及整页建树和只给变位区域建树各要多久。
+
+网页来源可以是 look_in_web 的网页缓存目录（默认 http_cache），也可以是一个放着 .html 文件的目录；
+没有 http_cache 时用仓库里的 fixtures/pages。
+
+每次运行还会拿 fixtures/pages 里的网页和 fixtures/expected.json 比较，每个解析器的结果（包括被动语态）
+都要和它逐项相同。expected.json 里主动语态的部分是用改写之前的 extract_verb_conjugation 生成的。
+fixtures/pages 里是手工做的网页，不是从 Bescherelle 保存的：结构照着它的变位区域，变位是占位文本，
+导航是填充的。它只能说明解析代码改写前后结果没变，不能说明两个解析器在真实网页上结果相同，
+要检查这一点，得用 http_cache 里真实抓下来的网页运行。
+
+用法：
+    python benchmarks/bench_parsers.py                 # 用 http_cache 里的网页，没有的话用 fixtures/pages
+    python benchmarks/bench_parsers.py pages/ -n 5     # 用 pages/ 目录里的网页，重复 5 轮取中位数
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+from http_client import ResponseCache, CACHE_DIR
+from look_in_web import PARSERS, CONJUGATION_CONTAINER, extract_verb_conjugation, lxml
+
+REFERENCE_PARSER = "html.parser"
+FIXTURE_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+FIXTURE_EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "expected.json")
+
+
+def load_pages(pages_dir):
+    """返回 {名字: 网页内容}，目录不存在时返回空字典"""
+    if not os.path.isdir(pages_dir):
+        return {}
+    names = os.listdir(pages_dir)
+    if any(name.endswith(".json") for name in names):
+        cache = ResponseCache(pages_dir)
+        pages = {}
+        for url in cache.urls():
+            meta, body = cache.get(url)
+            pages[url] = body.decode(meta.get("encoding") or "utf-8", errors="replace")
+        return pages
+
+    pages = {}
+    for name in sorted(names):
+        path = os.path.join(pages_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                pages[name] = file.read()
+    return pages
+
+
+def check_parity(pages, parsers):
+    """每个解析器的结果都要和 html.parser 的逐项相同，返回不一致的 (解析器, 网页, 属性) 列表"""
+    mismatches = []
+    for name, html in pages.items():
+        reference = extract_verb_conjugation(html, REFERENCE_PARSER)
+        for parser in parsers:
+            if parser == REFERENCE_PARSER:
+                continue
+            result = extract_verb_conjugation(html, parser)
+            for attr in sorted(set(reference) | set(result)):
+                if reference.get(attr) != result.get(attr):
+                    mismatches.append((parser, name, attr))
+    return mismatches
+
+
+def check_expected(parsers):
+    """fixtures/pages 里的网页逐项和 expected.json 比较，返回不一致的 (解析器, 网页, 属性) 列表"""
+    with open(FIXTURE_EXPECTED, 'r', encoding='utf-8') as file:
+        expected = json.load(file)
+    pages = load_pages(FIXTURE_PAGES)
+    mismatches = []
+    for name, reference in expected.items():
+        for parser in parsers:
+            result = extract_verb_conjugation(pages[name], parser, passive=True)
+            for attr in sorted(set(reference) | set(result)):
+                if reference.get(attr) != result.get(attr):
+                    mismatches.append((parser, name, attr))
+    return mismatches
+
+
+def pages_per_second(pages, parser, repeat):
+    """把所有网页解析 repeat 轮，返回每秒解析网页数的中位数"""
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages.values():
+            extract_verb_conjugation(html, parser)
+        rates.append(len(pages) / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def build_milliseconds(pages, parser, parse_only, repeat):
+    """每个网页建树平均要多少毫秒，parse_only 为 None 时给整页建树"""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages.values():
+            BeautifulSoup(html, parser, parse_only=parse_only)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds) / len(pages) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="extract_verb_conjugation 解析器对比")
+    parser.add_argument("pages", nargs="?", help="网页缓存目录或 .html 文件目录，默认 http_cache，没有的话用 fixtures/pages")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="重复轮数，取中位数")
+    args = parser.parse_args()
+
+    pages_dir = args.pages
+    if pages_dir is None:
+        pages_dir = os.path.join(ROOT, CACHE_DIR)
+        if not os.path.isdir(pages_dir):
+            pages_dir = FIXTURE_PAGES
+    pages = load_pages(pages_dir)
+    if not pages:
+        print(f"{pages_dir} 里没有网页")
+        return 1
+
+    parsers = [p for p in PARSERS if p != "lxml" or lxml]
+    fixture_mismatches = check_expected(parsers)
+    for parser_name, name, attr in fixture_mismatches:
+        print(f"和 expected.json 不一致：{parser_name} {name} {attr}")
+    print(f"固定网页和预期结果比较{'失败' if fixture_mismatches else '通过'}")
+
+    mismatches = check_parity(pages, parsers)
+    for parser_name, name, attr in mismatches:
+        print(f"结果不一致：{parser_name} {name} {attr}")
+    print(f"{len(pages)} 个网页，一致性检查{'失败' if mismatches else '通过'}")
+
+    for parser_name in parsers:
+        whole = build_milliseconds(pages, parser_name, None, args.repeat)
+        container = build_milliseconds(pages, parser_name, CONJUGATION_CONTAINER, args.repeat)
+        print(f"  {parser_name:<12} {pages_per_second(pages, parser_name, args.repeat):8.1f} 页/秒，"
+              f"整页建树 {whole:.1f} 毫秒/页，只建变位区域 {container:.1f} 毫秒/页")
+    return 1 if mismatches or fixture_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
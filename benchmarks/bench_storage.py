@@ -0,0 +1,141 @@
+"""
+CSVAttributeManager 存储层基准测试，在仓库里真实的两个CSV上测：
+加载、整表保存（compact）、单格 write_attribute（整表重写和日志模式）、add_attribute、delete_element，
+以及峰值内存。只用公开的接口，每次保存后文件状态都会更新，下一项测量不会多算一次从磁盘重新加载。
+结果写进 JSON 文件，方便在不同提交之间比较；benchmarks/results/ 不提交到仓库，要留存的结果用 -o 另存。
+
+用法：
+    python benchmarks/bench_storage.py                      # 结果写到 benchmarks/results/<提交>.json
+    python benchmarks/bench_storage.py -o out.json -n 5     # 指定输出文件和重复次数
+    python benchmarks/bench_storage.py --compare old.json   # 和之前的结果对比
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from csv_attribute_manager import CSVAttributeManager
+
+DATASETS = ["french_verbs_conjugations.csv", "conjugations_to_anki.csv"]
+
+
+def timed(func, repeat):
+    """重复执行 func(i)，返回每次耗时的中位数（秒）"""
+    seconds = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def bench_dataset(name, repeat):
+    """在一个新进程里测一个数据集，返回 {操作: 秒数} 和峰值内存"""
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        csv_file = os.path.join(tmp_dir, name)
+        shutil.copyfile(os.path.join(ROOT, name), csv_file)
+
+        results = {}
+        results["load"] = timed(lambda i: CSVAttributeManager(csv_file), repeat)
+
+        manager = CSVAttributeManager(csv_file)
+        rows, columns = len(manager.elements), len(manager.attributes)
+        element = manager.elements[len(manager.elements) // 2]
+        attribute = manager.attributes[-1]
+        # 没有日志时 compact 就是把整个表格重写一遍（保留 save_data 这个名字，和以前的结果对比）
+        results["save_data"] = timed(lambda i: manager.compact(), repeat)
+        results["write_attribute"] = timed(
+            lambda i: manager.write_attribute(element, attribute, f"bench {i}"), repeat)
+        results["add_attribute"] = timed(lambda i: manager.add_attribute(f"bench_attribute_{i}"), repeat)
+        results["delete_element"] = timed(
+            lambda i: manager.delete_element(manager.elements[len(manager.elements) // 2]), repeat)
+
+        journal_manager = CSVAttributeManager(csv_file, journal=True)
+        results["write_attribute_journal"] = timed(
+            lambda i: journal_manager.write_attribute(element, attribute, f"journal {i}"), repeat)
+        journal_manager.compact()
+
+        # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            max_rss //= 1024
+        return {
+            "rows": rows,
+            "columns": columns,
+            "seconds": results,
+            "peak_rss_mb": max_rss / 1024,
+        }
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def git_commit():
+    """当前的提交号，不在 git 仓库里时返回 None"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """打印两次结果之间每项操作的耗时变化"""
+    print(f"\n对比 {old.get('commit')} -> {new.get('commit')}")
+    for name, dataset in new["datasets"].items():
+        old_dataset = old.get("datasets", {}).get(name)
+        if not old_dataset:
+            continue
+        print(name)
+        for op, seconds in dataset["seconds"].items():
+            old_seconds = old_dataset["seconds"].get(op)
+            if old_seconds:
+                print(f"  {op:<24} {old_seconds * 1000:10.2f} ms -> {seconds * 1000:10.2f} ms"
+                      f"  ({seconds / old_seconds:.2f}x)")
+        print(f"  {'peak_rss_mb':<24} {old_dataset['peak_rss_mb']:10.1f} MB -> {dataset['peak_rss_mb']:10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSVAttributeManager 存储层基准测试")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="每项操作重复的次数，取中位数")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认 benchmarks/results/<提交>.json")
+    parser.add_argument("--compare", help="和之前的结果 JSON 文件对比")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {"commit": commit, "python": sys.version.split()[0], "repeat": args.repeat, "datasets": {}}
+    # 每个数据集在单独的新进程里测，峰值内存互不影响
+    context = multiprocessing.get_context("spawn")
+    for name in DATASETS:
+        with context.Pool(1) as pool:
+            report["datasets"][name] = pool.apply(bench_dataset, (name, args.repeat))
+
+        dataset = report["datasets"][name]
+        print(f"{name}（{dataset['rows']} 行 × {dataset['columns']} 列）")
+        for op, seconds in dataset["seconds"].items():
+            print(f"  {op:<24} {seconds * 1000:10.2f} ms")
+        print(f"  {'peak_rss_mb':<24} {dataset['peak_rss_mb']:10.1f} MB")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
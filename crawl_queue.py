@@ -0,0 +1,155 @@
+import sqlite3
+from time import time
+from contextlib import contextmanager
+
+# 任务状态
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+QUEUE_FILE = "crawl_queue.sqlite"
+
+
+class CrawlQueue:
+    """
+    抓取任务队列，存在本地 SQLite 文件里，每个动词一个任务：
+    pending（等待抓取）-> in_flight（正在抓取）-> done（已写入）或 failed（记录错误和重试次数）。
+    程序中途退出后，下次运行先把 in_flight 放回 pending，接着上次的进度继续，已完成的动词不会再抓。
+    """
+
+    def __init__(self, db_file=QUEUE_FILE, timeout=30):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                verb TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL,
+                retries INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '',
+                position INTEGER NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, position);
+        """)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """一组修改放在一个事务里，出错时回滚"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _set_state(self, verbs, state, error=None):
+        with self._transaction():
+            if error is None:
+                self.conn.executemany("UPDATE jobs SET state = ?, updated = ? WHERE verb = ?",
+                                      [(state, time(), verb) for verb in verbs])
+            else:
+                self.conn.executemany(
+                    "UPDATE jobs SET state = ?, error = ?, retries = retries + 1, updated = ? WHERE verb = ?",
+                    [(state, error, time(), verb) for verb in verbs])
+
+    def add(self, verb, url):
+        """加入一个任务，已经在队列里的动词（不管什么状态）保持原样"""
+        self.add_many([(verb, url)])
+
+    def add_many(self, jobs):
+        """一次加入多个 (动词, 网址) 任务，返回新加入的个数"""
+        before = self.conn.total_changes
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (verb, url, state, position, updated) "
+                "VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM jobs), ?)",
+                [(verb, url, PENDING, time()) for verb, url in jobs])
+        return self.conn.total_changes - before
+
+    def upsert_many(self, jobs, reset_failed=True):
+        """
+        加入或更新 (动词, 网址) 任务：不在队列里的加入；还没完成、但网址变了的（reset_failed 时还有失败过的）
+        换成新网址放回 pending，失败次数清零；已完成的不动。返回加入或更新的个数
+        """
+        before = self.conn.total_changes
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT INTO jobs (verb, url, state, position, updated) "
+                "VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM jobs), ?) "
+                "ON CONFLICT (verb) DO UPDATE SET url = excluded.url, state = excluded.state, retries = 0, "
+                "error = '', updated = excluded.updated "
+                "WHERE jobs.state != ? AND (jobs.url != excluded.url OR (? AND jobs.state = ?))",
+                [(verb, url, PENDING, time(), DONE, reset_failed, FAILED) for verb, url in jobs])
+        return self.conn.total_changes - before
+
+    def reconcile_done(self, present):
+        """标记为完成、但不在 present（表格里实际有的动词）里的任务放回 pending，返回这些动词"""
+        missing = [verb for verb, in self.conn.execute("SELECT verb FROM jobs WHERE state = ?", (DONE,))
+                   if verb not in present]
+        self._set_state(missing, PENDING)
+        return missing
+
+    def job(self, verb):
+        """动词的 (状态, 网址, 失败次数)，不在队列里时返回 None"""
+        return self.conn.execute("SELECT state, url, retries FROM jobs WHERE verb = ?", (verb,)).fetchone()
+
+    def recover(self):
+        """上次运行中断时留下的 in_flight 任务放回 pending，返回个数"""
+        with self._transaction():
+            return self.conn.execute("UPDATE jobs SET state = ? WHERE state = ?", (PENDING, IN_FLIGHT)).rowcount
+
+    def retry_failed(self, max_retries):
+        """失败次数还没到 max_retries 的任务放回 pending，返回个数"""
+        with self._transaction():
+            return self.conn.execute("UPDATE jobs SET state = ? WHERE state = ? AND retries < ?",
+                                     (PENDING, FAILED, max_retries)).rowcount
+
+    def claim(self, limit=None):
+        """按加入顺序取出最多 limit 个 pending 任务并标记为 in_flight，返回 [(动词, 网址)]"""
+        with self._transaction():
+            jobs = self.conn.execute(
+                "SELECT verb, url FROM jobs WHERE state = ? ORDER BY position LIMIT ?",
+                (PENDING, -1 if limit is None else limit)).fetchall()
+            self.conn.executemany("UPDATE jobs SET state = ?, updated = ? WHERE verb = ?",
+                                  [(IN_FLIGHT, time(), verb) for verb, _ in jobs])
+        return jobs
+
+    def requeue(self, verbs):
+        """把取出来但这次不抓的任务放回 pending"""
+        self._set_state(verbs, PENDING)
+
+    def done(self, verb):
+        """任务完成"""
+        self._set_state([verb], DONE)
+
+    def done_many(self, verbs):
+        """一次把多个任务标记为完成"""
+        self._set_state(verbs, DONE)
+
+    def fail(self, verb, error):
+        """任务失败，记录错误信息，重试次数加一"""
+        self._set_state([verb], FAILED, str(error))
+
+    def state(self, verb):
+        """动词的任务状态，不在队列里时返回 None"""
+        row = self.conn.execute("SELECT state FROM jobs WHERE verb = ?", (verb,)).fetchone()
+        return row[0] if row else None
+
+    def failures(self):
+        """所有失败的任务：[(动词, 网址, 重试次数, 错误信息)]"""
+        return self.conn.execute("SELECT verb, url, retries, error FROM jobs WHERE state = ? ORDER BY position",
+                                 (FAILED,)).fetchall()
+
+    def counts(self):
+        """每种状态的任务个数"""
+        counts = dict.fromkeys((PENDING, IN_FLIGHT, DONE, FAILED), 0)
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return counts
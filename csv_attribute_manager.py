@@ -0,0 +1,696 @@
+import os
+import io
+import sys
+import csv
+import json
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有 fcntl，不加锁
+    fcntl = None
+
+
+# 日志文件的后缀，放在CSV文件旁边
+JOURNAL_SUFFIX = ".journal"
+# 日志超过这个大小（字节）时自动合并回CSV
+DEFAULT_JOURNAL_LIMIT = 1024 * 1024
+# 懒加载模式下行偏移索引文件的后缀
+INDEX_SUFFIX = ".index"
+# 跨进程建议锁文件的后缀
+LOCK_SUFFIX = ".lock"
+# 建二级索引的属性，第一次按它们查询时建立，之后随写入更新
+INDEXED_ATTRIBUTES = ("indice", "caracterisation", "labels")
+# 这些属性的值是空格分隔的多个标签，按单个标签建索引
+TOKENIZED_ATTRIBUTES = ("labels",)
+
+
+def _scan_records(file):
+    """逐条读出二进制CSV文件中的记录，返回 (字节偏移, 原始字节)，引号里的换行不算记录结束"""
+    offset = file.tell()
+    record = b''
+    quotes = 0
+    for line in file:
+        record += line
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield offset, record
+            offset += len(record)
+            record = b''
+            quotes = 0
+    if record:
+        yield offset, record
+
+
+def _parse_record(record):
+    """把一条记录的原始字节解析成字段列表"""
+    return next(csv.reader([record.decode('utf-8')]), [])
+
+
+def _index_keys(attribute, value):
+    """某个属性值在二级索引里对应的键，多标签属性拆成单个标签，没有标签时记为空字符串"""
+    if attribute in TOKENIZED_ATTRIBUTES:
+        return value.split() or ['']
+    return [value]
+
+
+def _format_record(fields):
+    """把字段列表格式化成一条CSV记录的文本"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+class CSVAttributeManager:
+    def __init__(self, csv_file, journal=False, journal_limit=DEFAULT_JOURNAL_LIMIT, lazy=False,
+                 columns=None):
+        self.csv_file = csv_file
+        self.journal = journal  # 日志模式：每次修改只追加一行到日志，而不是重写整个CSV
+        self.journal_file = f"{csv_file}{JOURNAL_SUFFIX}"
+        self.journal_limit = journal_limit
+        self.lazy = lazy  # 懒加载模式：只建行偏移索引，读到哪一行才解析哪一行，第一次修改时再完整加载
+        self.index_file = f"{csv_file}{INDEX_SUFFIX}"
+        self._offsets = None  # 懒加载模式下：元素 -> 行在文件中的字节偏移
+        self._row_cache = {}
+        # 列投影：只解析并保留这些属性，其余列留在每行的原始文本里，保存时原样写回
+        self.columns = None if columns is None else set(columns)
+        self._raw_rows = None  # 列投影模式下每行的原始文本，新加的行为 None
+        self._raw_positions = {}  # 列投影模式下：原始表头中的属性 -> 字段位置
+        self._raw_header = []
+        self._dirty_elements = set()  # 列投影模式下已加载的列被修改过的元素
+        self._layout_changed = False  # 列投影模式下属性有没有增删过
+        # 按列存储：每个属性一列，列里按行号存放各元素的值
+        self.elements = []
+        self.attributes = []
+        self._row_index = {}  # 元素 -> 行号
+        self._attr_index = {}  # 属性 -> 列号
+        self._columns = []
+        self._indexes = {}  # 二级索引：属性 -> {值: 元素集合}
+        self._batch_depth = 0
+        self._pending = []  # 批量写入中还没有落盘的修改记录
+        self._batch_marks = []  # 每层批量写入开始时 _pending 的长度，回滚时只丢掉这一层的修改
+        # 多个进程同时读写同一个CSV时，用锁文件互斥，落盘前先合并其他进程的修改
+        self.lock_file = f"{csv_file}{LOCK_SUFFIX}"
+        self._lock_handle = None
+        self._disk_state = None  # 上次读取或写入后CSV和日志文件的 (大小, 修改时间)
+        with self._file_lock(shared=True):
+            self._load_data()
+
+    def _load_data(self):
+        """从CSV文件加载数据到内存，再重放日志中还没合并的修改"""
+        self._disk_state = self._disk_stamp()
+        self.elements = []
+        self.attributes = []
+        self._columns = []
+        self._offsets = None
+        self._row_cache = {}
+        self._raw_rows = None
+        self._raw_positions = {}
+        self._raw_header = []
+        self._dirty_elements = set()
+        self._layout_changed = False
+        self._indexes = {}
+
+        # 有还没合并的日志时直接完整加载，日志里的修改要重放到完整的数据上
+        if self.lazy and os.path.exists(self.csv_file) and not os.path.exists(self.journal_file):
+            self._load_index()
+            return
+
+        # 如果文件不存在，保持空的数据结构
+        if os.path.exists(self.csv_file) and self.columns is not None:
+            self._load_projected()
+        elif os.path.exists(self.csv_file):
+            with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
+                reader = csv.reader(file)
+                header = next(reader, None)
+                # 跳过空行，并把长短不一的行补齐或截断到表头的长度
+                width = len(header) if header else 0
+                rows = [row if len(row) == width else row[:width] + [''] * (width - len(row))
+                        for row in reader if row]
+
+            if header:
+                # 第一行是属性名（第一列为空）
+                self.attributes = header[1:]
+                if rows:
+                    # 转置成按列存储，相同的字符串只保留一份
+                    columns = zip(*rows)
+                    self.elements = list(next(columns))
+                    self._columns = [list(map(sys.intern, column)) for column in columns]
+                else:
+                    self._columns = [[] for _ in self.attributes]
+
+        self._reindex()
+        self._replay_journal()
+
+    def _load_projected(self):
+        """列投影：只保留需要的列，同时留下每行的原始文本"""
+        current = [None]
+
+        def records(file):
+            for _, record in _scan_records(file):
+                current[0] = record.decode('utf-8')
+                yield current[0]
+
+        with open(self.csv_file, 'rb') as file:
+            reader = csv.reader(records(file))
+            header = next(reader, None)
+            if not header:
+                return
+
+            # 第一行是属性名（第一列为空）
+            self.attributes = header[1:]
+            self._raw_header = header[1:]
+            self._raw_positions = {attr: col + 1 for col, attr in enumerate(self.attributes)}
+            self._columns = [[] if attr in self.columns else None for attr in self.attributes]
+            loaded = [(self._raw_positions[attr], column)
+                      for attr, column in zip(self.attributes, self._columns) if column is not None]
+            self._raw_rows = []
+
+            for row in reader:
+                if row:  # 跳过空行
+                    self.elements.append(row[0])
+                    self._raw_rows.append(current[0])
+                    for pos, column in loaded:
+                        column.append(sys.intern(row[pos]) if pos < len(row) else '')
+
+    def _raw_fields(self, row):
+        """列投影：解析某一行的原始文本，补齐到原始表头的长度"""
+        raw = self._raw_rows[row]
+        fields = next(csv.reader([raw]), []) if raw is not None else [self.elements[row]]
+        return fields + [''] * (len(self._raw_header) + 1 - len(fields))
+
+    def _reindex(self):
+        """重建元素和属性的位置索引"""
+        self._row_index = {element: row for row, element in enumerate(self.elements)}
+        self._attr_index = {attr: col for col, attr in enumerate(self.attributes)}
+
+    def _load_index(self):
+        """懒加载：读取行偏移索引，CSV文件的大小或修改时间变了就重建"""
+        stat = os.stat(self.csv_file)
+        index = None
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as file:
+                    index = json.load(file)
+            except ValueError:
+                index = None
+        if not index or index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+            index = self._build_index(stat)
+
+        self.attributes = index["attributes"]
+        self.elements = [element for element, _ in index["offsets"]]
+        self._offsets = dict(index["offsets"])
+        self._reindex()
+
+    def _build_index(self, stat):
+        """扫描一遍CSV文件，记下每个元素所在行的字节偏移，并保存到索引文件"""
+        attributes = []
+        offsets = []
+        with open(self.csv_file, 'rb') as file:
+            for offset, record in _scan_records(file):
+                if not record.strip():
+                    continue  # 跳过空行
+                row = _parse_record(record)
+                if offset == 0:
+                    # 第一行是属性名（第一列为空）
+                    attributes = row[1:]
+                else:
+                    offsets.append([row[0], offset])
+
+        index = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "attributes": attributes,
+            "offsets": offsets,
+        }
+        with open(self.index_file, 'w', encoding='utf-8') as file:
+            json.dump(index, file, ensure_ascii=False)
+        return index
+
+    def _read_row(self, element):
+        """懒加载：按偏移只读取并解析一个元素所在的行"""
+        if element not in self._row_cache:
+            with open(self.csv_file, 'rb') as file:
+                file.seek(self._offsets[element])
+                _, record = next(_scan_records(file))
+            row = _parse_record(record)[1:]
+            # 长短不一的行补齐到表头的长度
+            self._row_cache[element] = row + [''] * (len(self.attributes) - len(row))
+        return self._row_cache[element]
+
+    def _refresh_stale_offsets(self, element):
+        """
+        懒加载：要读还没缓存的行之前，先看文件有没有被其他写入者改过，
+        改过的话行偏移已经失效，重新读取索引（出现了日志时完整加载并重放日志）
+        """
+        if self._offsets is not None and element not in self._row_cache \
+                and self._disk_stamp() != self._disk_state:
+            with self._file_lock(shared=True):
+                self._load_data()
+
+    def _ensure_loaded(self):
+        """懒加载模式下第一次修改前，先把整个文件完整加载到内存"""
+        if self._offsets is not None:
+            self.lazy = False
+            with self._file_lock(shared=True):
+                self._load_data()
+
+    def _replay_journal(self):
+        """把日志中的修改按顺序重放到内存中"""
+        if not os.path.exists(self.journal_file):
+            return
+
+        with open(self.journal_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 最后一行可能在追加时被中断，只写了半截
+                    break
+                self._apply(record)
+
+    def _save_data(self):
+        """将数据保存回CSV文件，先写临时文件再替换，中途出错也不会截断原文件"""
+        tmp_file = f"{self.csv_file}.tmp"
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+
+            # 写入属性行
+            writer.writerow([''] + self.attributes)
+
+            # 写入数据行
+            if self._raw_rows is None:
+                writer.writerows(zip(self.elements, *self._columns))
+            else:
+                self._write_projected(file, writer)
+
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.csv_file)
+
+        # 日志里的修改都已经写进CSV了
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def _write_projected(self, file, writer):
+        """列投影模式下写入数据行：没改过的行直接写回原始文本，其余行补上没加载的列再写"""
+        for row, element in enumerate(self.elements):
+            raw = self._raw_rows[row]
+            if raw is not None and not self._layout_changed and element not in self._dirty_elements:
+                file.write(raw.rstrip('\r\n') + '\r\n')
+                continue
+
+            fields = None
+            values = [element]
+            for attr, column in zip(self.attributes, self._columns):
+                if column is not None:
+                    values.append(column[row])
+                else:
+                    if fields is None:
+                        fields = self._raw_fields(row)
+                    values.append(fields[self._raw_positions[attr]])
+            writer.writerow(values)
+
+    def _append_journal(self, records):
+        """把修改记录追加到日志末尾，返回日志当前的大小"""
+        with open(self.journal_file, 'a', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+            return file.tell()
+
+    @contextmanager
+    def _file_lock(self, shared=False):
+        """跨进程的建议锁：读取时加共享锁，落盘时加排他锁；同一个对象里可以重入"""
+        if fcntl is None or self._lock_handle is not None:
+            yield
+            return
+
+        self._lock_handle = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _disk_stamp(self):
+        """CSV文件和日志文件当前的 (大小, 修改时间)，用来判断其他进程有没有改过"""
+        stamp = []
+        for path in (self.csv_file, self.journal_file):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _merge_disk_changes(self, records):
+        """其他进程改过文件时重新读取，再把自己还没落盘的修改重放上去，按单元格合并"""
+        if self._disk_stamp() != self._disk_state:
+            self._load_data()
+            for record in records:
+                self._apply(record)
+
+    def _persist(self, records):
+        """把修改落盘：日志模式下追加日志，否则重写整个CSV"""
+        with self._file_lock():
+            self._merge_disk_changes(records)
+            if self.journal:
+                if self._append_journal(records) >= self.journal_limit:
+                    self._save_data()
+            else:
+                self._save_data()
+            self._disk_state = self._disk_stamp()
+
+    def _changed(self, record):
+        """记录一次修改，批量写入进行中时先攒在内存里"""
+        if self._batch_depth > 0:
+            self._pending.append(record)
+        else:
+            self._persist([record])
+
+    def compact(self):
+        """把日志合并回CSV文件并删除日志"""
+        if self._batch_depth > 0:
+            raise ValueError("批量写入进行中，不能合并日志")
+        self._ensure_loaded()
+        with self._file_lock():
+            self._merge_disk_changes([])
+            self._save_data()
+            self._disk_state = self._disk_stamp()
+
+    def refresh(self):
+        """读入其他进程已经落盘的修改，批量写入中还没落盘的修改会保留"""
+        with self._file_lock(shared=True):
+            self._merge_disk_changes(self._pending)
+
+    def begin(self):
+        """开始批量写入，之后的修改只在内存中进行，直到最外层的 commit()"""
+        self._batch_marks.append(len(self._pending))
+        self._batch_depth += 1
+
+    def commit(self):
+        """结束批量写入，最外层提交时把所有修改一次性写回文件"""
+        if self._batch_depth == 0:
+            raise ValueError("没有进行中的批量写入")
+
+        self._batch_marks.pop()
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._pending:
+            records = self._pending
+            self._pending = []
+            self._persist(records)
+
+    def rollback(self):
+        """
+        放弃当前这一层批量写入的修改：从CSV文件重新加载，再重放外层还没落盘的修改。
+        嵌套时只结束这一层，外层的批量写入继续，之后照常 commit()
+        """
+        if self._batch_depth > 0:
+            self._batch_depth -= 1
+            self._pending = self._pending[:self._batch_marks.pop()]
+        with self._file_lock(shared=True):
+            self._load_data()
+            for record in self._pending:
+                self._apply(record)
+
+    @contextmanager
+    def batch(self):
+        """批量写入的上下文管理器：正常退出时提交，出错时回滚"""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def read_attribute(self, element, attribute):
+        """读取指定元素的指定属性值"""
+        self._refresh_stale_offsets(element)
+        if element not in self._row_index:
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        if attribute not in self._attr_index:
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        if self._offsets is not None:
+            return self._read_row(element)[self._attr_index[attribute]]
+        column = self._columns[self._attr_index[attribute]]
+        row = self._row_index[element]
+        if column is None:
+            # 列投影时没有加载的列，从这一行的原始文本里取
+            return self._raw_fields(row)[self._raw_positions[attribute]]
+        return column[row]
+
+    def write_attribute(self, element, attribute, value):
+        """写入指定元素的指定属性值"""
+        self._ensure_loaded()
+        value = str(value)
+        self._set(element, attribute, value)
+        self._changed(["write", element, attribute, value])
+
+    def add_element(self, element):
+        """添加新元素"""
+        self._ensure_loaded()
+        if element in self._row_index:
+            raise ValueError(f"元素 '{element}' 已存在")
+
+        self._insert_element(element)
+        self._changed(["add_element", element])
+
+    def add_attribute(self, attribute):
+        """添加新属性"""
+        self._ensure_loaded()
+        if attribute in self._attr_index:
+            raise ValueError(f"属性 '{attribute}' 已存在")
+
+        self._insert_attribute(attribute)
+        self._changed(["add_attribute", attribute])
+
+    def get_all_elements(self):
+        """获取所有元素列表"""
+        return self.elements.copy()
+
+    def get_all_attributes(self):
+        """获取所有属性列表"""
+        return self.attributes.copy()
+
+    @classmethod
+    def iter_rows(cls, csv_file, columns=None):
+        """
+        逐行流式读取CSV文件，返回 (元素, {属性: 值})，不把整个文件加载到内存。
+        columns 是要返回的属性列表，默认返回全部属性。
+        """
+        if os.path.exists(f"{csv_file}{JOURNAL_SUFFIX}"):
+            # 还有没合并的日志时，只能完整加载重放日志后再逐行返回
+            manager = cls(csv_file)
+            wanted = [attr for attr in manager.attributes if columns is None or attr in columns]
+            for element in manager.elements:
+                yield element, {attr: manager.read_attribute(element, attr) for attr in wanted}
+            return
+
+        if not os.path.exists(csv_file):
+            return
+
+        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if not header:
+                return
+
+            # 第一行是属性名（第一列为空）
+            wanted = [(attr, col + 1) for col, attr in enumerate(header[1:]) if columns is None or attr in columns]
+            for row in reader:
+                if row:  # 跳过空行
+                    yield row[0], {attr: row[pos] if pos < len(row) else '' for attr, pos in wanted}
+
+    @classmethod
+    def iter_cells(cls, csv_file, columns=None):
+        """逐个单元格流式读取CSV文件，返回 (元素, 属性, 值)"""
+        for element, values in cls.iter_rows(csv_file, columns):
+            for attr, value in values.items():
+                yield element, attr, value
+
+    def get_element_data(self, element):
+        """获取元素的所有属性数据"""
+        self._refresh_stale_offsets(element)
+        if element not in self._row_index:
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        if self._offsets is not None:
+            return dict(zip(self.attributes, self._read_row(element)))
+        row = self._row_index[element]
+        fields = self._raw_fields(row) if self._raw_rows is not None else None
+        return {attr: column[row] if column is not None else fields[self._raw_positions[attr]]
+                for attr, column in zip(self.attributes, self._columns)}
+
+    def delete_element(self, element):
+        """删除元素"""
+        self._ensure_loaded()
+        if element not in self._row_index:
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        self._remove_element(element)
+        self._changed(["delete_element", element])
+
+    def delete_attribute(self, attribute):
+        """删除属性"""
+        self._ensure_loaded()
+        if attribute not in self._attr_index:
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        self._remove_attribute(attribute)
+        self._changed(["delete_attribute", attribute])
+
+    def _index(self, attribute):
+        """取得某个属性的二级索引，还没有建立时先建立"""
+        if attribute not in self._indexes:
+            index = {}
+            for element in self.elements:
+                for key in _index_keys(attribute, self.read_attribute(element, attribute)):
+                    index.setdefault(key, set()).add(element)
+            self._indexes[attribute] = index
+        return self._indexes[attribute]
+
+    def _match(self, attribute, value):
+        """找出某个属性等于给定值的元素集合，多标签属性只要包含这个标签即可"""
+        if attribute in INDEXED_ATTRIBUTES:
+            return set(self._index(attribute).get(value, ()))
+        return {element for element in self.elements if self.read_attribute(element, attribute) == value}
+
+    def select(self, where=None, columns=None):
+        """
+        批量查询：返回 {元素: {属性: 值}}，顺序和 elements 一致。
+        where 是 {属性: 值} 的条件，全部满足才返回；labels 这类多标签属性按单个标签匹配。
+        columns 是要返回的属性列表，默认返回全部属性。
+        """
+        self._ensure_loaded()
+        where = where or {}
+        columns = self.attributes if columns is None else columns
+        for attribute in list(where) + list(columns):
+            if attribute not in self._attr_index:
+                raise ValueError(f"属性 '{attribute}' 不存在")
+
+        matched = None
+        for attribute, value in where.items():
+            found = self._match(attribute, value)
+            matched = found if matched is None else matched & found
+        elements = self.elements if matched is None else sorted(matched, key=self._row_index.__getitem__)
+
+        return {element: {attr: self.read_attribute(element, attr) for attr in columns} for element in elements}
+
+    def value_counts(self, attribute):
+        """统计某个属性每个取值对应的元素个数，多标签属性按单个标签统计"""
+        self._ensure_loaded()
+        if attribute not in self._attr_index:
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        if attribute in INDEXED_ATTRIBUTES:
+            return {key: len(elements) for key, elements in self._index(attribute).items() if elements}
+        counts = {}
+        for element in self.elements:
+            for key in _index_keys(attribute, self.read_attribute(element, attribute)):
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _unindex(self, element):
+        """把一个元素从所有已建立的二级索引中去掉"""
+        for attribute, index in self._indexes.items():
+            for key in _index_keys(attribute, self.read_attribute(element, attribute)):
+                index[key].discard(element)
+
+    # 下面这些方法只修改内存中的数据，重放日志时同一条记录可能被应用两次，所以都要容忍重复
+
+    def _apply(self, record):
+        """把一条修改记录应用到内存中"""
+        op, *args = record
+        if op == "write":
+            self._set(*args)
+        elif op == "add_element":
+            self._insert_element(*args)
+        elif op == "add_attribute":
+            self._insert_attribute(*args)
+        elif op == "delete_element":
+            self._remove_element(*args)
+        elif op == "delete_attribute":
+            self._remove_attribute(*args)
+
+    def _set(self, element, attribute, value):
+        # 如果元素不存在，创建新元素；如果属性不存在，添加到属性列表
+        self._insert_element(element)
+        self._insert_attribute(attribute)
+
+        # 更新二级索引
+        index = self._indexes.get(attribute)
+        if index is not None:
+            for key in _index_keys(attribute, self.read_attribute(element, attribute)):
+                index[key].discard(element)
+            for key in _index_keys(attribute, value):
+                index.setdefault(key, set()).add(element)
+
+        # 设置属性值
+        column = self._columns[self._attr_index[attribute]]
+        row = self._row_index[element]
+        if column is None:
+            # 列投影时没有加载的列，直接改这一行的原始文本
+            fields = self._raw_fields(row)
+            fields[self._raw_positions[attribute]] = value
+            self._raw_rows[row] = _format_record(fields)
+        else:
+            column[row] = sys.intern(value)
+            if self._raw_rows is not None:
+                self._dirty_elements.add(element)
+
+    def _insert_element(self, element):
+        if element in self._row_index:
+            return
+        self._row_index[element] = len(self.elements)
+        self.elements.append(element)
+        for column in self._columns:
+            if column is not None:
+                column.append('')
+        if self._raw_rows is not None:
+            self._raw_rows.append(None)
+        for attribute, index in self._indexes.items():
+            for key in _index_keys(attribute, ''):
+                index.setdefault(key, set()).add(element)
+
+    def _insert_attribute(self, attribute):
+        if attribute in self._attr_index:
+            return
+        self._attr_index[attribute] = len(self.attributes)
+        self.attributes.append(attribute)
+        self._columns.append([''] * len(self.elements))
+        self._layout_changed = True
+        self._indexes.pop(attribute, None)
+
+    def _remove_element(self, element):
+        if element not in self._row_index:
+            return
+        self._unindex(element)
+        row = self._row_index.pop(element)
+        del self.elements[row]
+        for column in self._columns:
+            if column is not None:
+                del column[row]
+        if self._raw_rows is not None:
+            del self._raw_rows[row]
+            self._dirty_elements.discard(element)
+        # 后面的元素都往前挪了一行
+        for i in range(row, len(self.elements)):
+            self._row_index[self.elements[i]] = i
+
+    def _remove_attribute(self, attribute):
+        if attribute not in self._attr_index:
+            return
+        self._indexes.pop(attribute, None)
+        col = self._attr_index[attribute]
+        del self.attributes[col]
+        del self._columns[col]
+        self._layout_changed = True
+        self._reindex()
@@ -1,12 +1,10 @@
 import fitz  # PyMuPDF
-import csv
 import re
 import json
-import csv
-import os
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 from copy import deepcopy
+from sqlite_attribute_manager import open_manager
 
 @dataclass
 class TextElement:
@@ -581,154 +579,12 @@ class FrenchVerbExtractor:
         # print(all_verbs)
         return all_verbs
 
-class CSVAttributeManager:
-    def __init__(self, csv_file):
-        self.csv_file = csv_file
-        self.data = {}
-        self.elements = []
-        self.attributes = []
-        self._load_data()
-
-    def _load_data(self):
-        """从CSV文件加载数据到内存"""
-        if not os.path.exists(self.csv_file):
-            # 如果文件不存在，创建空的数据结构
-            self.data = {}
-            self.elements = []
-            self.attributes = []
-            return
-
-        with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            rows = list(reader)
-
-            if not rows:
-                self.data = {}
-                self.elements = []
-                self.attributes = []
-                return
-
-            # 第一行是属性名（第一列为空）
-            self.attributes = rows[0][1:]
-
-            # 读取数据
-            self.elements = []
-            self.data = {}
-
-            for row in rows[1:]:
-                if row:  # 跳过空行
-                    element = row[0]
-                    self.elements.append(element)
-                    self.data[element] = {}
-
-                    for i, attr_value in enumerate(row[1:]):
-                        if i < len(self.attributes):
-                            attr_name = self.attributes[i]
-                            self.data[element][attr_name] = attr_value
-
-    def _save_data(self):
-        """将数据保存回CSV文件"""
-        with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-
-            # 写入属性行
-            writer.writerow([''] + self.attributes)
-
-            # 写入数据行
-            for element in self.elements:
-                row = [element]
-                for attr in self.attributes:
-                    row.append(self.data.get(element, {}).get(attr, ''))
-                writer.writerow(row)
-
-    def read_attribute(self, element, attribute):
-        """读取指定元素的指定属性值"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        return self.data[element].get(attribute, '')
-
-    def write_attribute(self, element, attribute, value):
-        """写入指定元素的指定属性值"""
-        # 如果元素不存在，创建新元素
-        if element not in self.data:
-            self.elements.append(element)
-            self.data[element] = {}
-
-        # 如果属性不存在，添加到属性列表
-        if attribute not in self.attributes:
-            self.attributes.append(attribute)
-            # 为所有现有元素添加这个新属性
-            for existing_element in self.elements:
-                if existing_element != element:
-                    self.data[existing_element][attribute] = ''
-
-        # 设置属性值
-        self.data[element][attribute] = str(value)
-        self._save_data()
-
-    def add_element(self, element):
-        """添加新元素"""
-        if element in self.data:
-            raise ValueError(f"元素 '{element}' 已存在")
-
-        self.elements.append(element)
-        self.data[element] = {attr: '' for attr in self.attributes}
-        self._save_data()
-
-    def add_attribute(self, attribute):
-        """添加新属性"""
-        if attribute in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 已存在")
-
-        self.attributes.append(attribute)
-        for element in self.elements:
-            self.data[element][attribute] = ''
-        self._save_data()
-
-    def get_all_elements(self):
-        """获取所有元素列表"""
-        return self.elements.copy()
-
-    def get_all_attributes(self):
-        """获取所有属性列表"""
-        return self.attributes.copy()
-
-    def get_element_data(self, element):
-        """获取元素的所有属性数据"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-        return self.data[element].copy()
-
-    def delete_element(self, element):
-        """删除元素"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        self.elements.remove(element)
-        del self.data[element]
-        self._save_data()
-
-    def delete_attribute(self, attribute):
-        """删除属性"""
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        self.attributes.remove(attribute)
-        for element in self.elements:
-            if attribute in self.data[element]:
-                del self.data[element][attribute]
-        self._save_data()
-
-def main():
+def main(output_file="french_verbs_conjugations.csv"):
+    """output_file：目录库，以 .sqlite/.db 结尾时写进 SQLiteAttributeManager"""
     pdf_path = "bescherelle.pdf"
-    output_csv = "french_verbs_conjugations.csv"
 
     extractor = FrenchVerbExtractor(pdf_path)
-    manager = CSVAttributeManager(output_csv)
+    manager = open_manager(output_file)
 
     print("开始提取法语动词变位...")
 
@@ -738,53 +594,49 @@ def main():
         print(f"\n总共提取了 {len(verbs)} 个动词")
 
         # 保存到CSV
-        for verb in verbs:
-            element = verb['verbe']
-            for attr_name, attr_value in verb.items():
-                if attr_name == 'verbe':
-                    continue
-                manager.write_attribute(element, attr_name, attr_value)
-        # 特殊的表格特殊处理
-        manager.write_attribute("être aimé", "subjonctif_imparfait_1p", "que nous fussions aimé(e)s")
-        manager.write_attribute("être aimé", "subjonctif_imparfait_3p", "qu’ils/elles fussent aimé(e)s")
-        manager.write_attribute("être aimé", "subjonctif_plus_que_parfait_1p", "que nous eussions été aimé(e)s")
-        manager.write_attribute("être aimé", "subjonctif_plus_que_parfait_3p", "qu’ils/elles eussentétéaimé(e)s")
+        with manager.batch():
+            for verb in verbs:
+                element = verb['verbe']
+                for attr_name, attr_value in verb.items():
+                    if attr_name == 'verbe':
+                        continue
+                    manager.write_attribute(element, attr_name, attr_value)
+            # 特殊的表格特殊处理
+            manager.write_attribute("être aimé", "subjonctif_imparfait_1p", "que nous fussions aimé(e)s")
+            manager.write_attribute("être aimé", "subjonctif_imparfait_3p", "qu’ils/elles fussent aimé(e)s")
+            manager.write_attribute("être aimé", "subjonctif_plus_que_parfait_1p", "que nous eussions été aimé(e)s")
+            manager.write_attribute("être aimé", "subjonctif_plus_que_parfait_3p", "qu’ils/elles eussentétéaimé(e)s")
         # manager.read_attribute(element, attribute)
-        print(f"结果已保存到 {output_csv}")
+        print(f"结果已保存到 {output_file}")
 
         # 提取目录页，188 - 256 页
         all_verbs = extractor.extract_from_repertoire(start_page=188, end_page=256)
 
         # 保存目录页结果到 CSV
-        for verb_from_repertoire in all_verbs:
-            element = verb_from_repertoire['verbe']
-            try:
-                indice_from_csv = manager.read_attribute(element, 'indice')
-                if indice_from_csv != verb_from_repertoire['caracterisation']:
-                    print(f"表格中存在 {element}，表格中的 indice 是 {indice_from_csv} 但目录中的是 {verb_from_repertoire['caracterisation']}")
-
-                if verb_from_repertoire['labels']:
-                    manager.write_attribute(element, 'labels', verb_from_repertoire['labels'])
-                if verb_from_repertoire['notes']:
-                    manager.write_attribute(element, 'notes', verb_from_repertoire['notes'])
-
-            except ValueError:  # 元素不存在，添加进表格中
-                if verb_from_repertoire['caracterisation']:
-                    manager.write_attribute(element, 'caracterisation', verb_from_repertoire['caracterisation'])
-                if verb_from_repertoire['labels']:
-                    manager.write_attribute(element, 'labels', verb_from_repertoire['labels'])
-                if verb_from_repertoire['notes']:
-                    manager.write_attribute(element, 'notes', verb_from_repertoire['notes'])
-
-        # 统计基础动词变位的常用次数
-        # stat_dict = {}
-        # for i in range(105):
-        #     stat_dict[str(i + 1)] = 1
-
-        # for verb_from_repertoire in all_verbs:
-        #     if verb_from_repertoire['caracterisation']:
-        #         stat_dict[verb_from_repertoire['caracterisation']] += 1
-
+        with manager.batch():
+            for verb_from_repertoire in all_verbs:
+                element = verb_from_repertoire['verbe']
+                try:
+                    indice_from_csv = manager.read_attribute(element, 'indice')
+                    if indice_from_csv != verb_from_repertoire['caracterisation']:
+                        print(f"表格中存在 {element}，表格中的 indice 是 {indice_from_csv} 但目录中的是 {verb_from_repertoire['caracterisation']}")
+
+                    if verb_from_repertoire['labels']:
+                        manager.write_attribute(element, 'labels', verb_from_repertoire['labels'])
+                    if verb_from_repertoire['notes']:
+                        manager.write_attribute(element, 'notes', verb_from_repertoire['notes'])
+
+                except ValueError:  # 元素不存在，添加进表格中
+                    if verb_from_repertoire['caracterisation']:
+                        manager.write_attribute(element, 'caracterisation', verb_from_repertoire['caracterisation'])
+                    if verb_from_repertoire['labels']:
+                        manager.write_attribute(element, 'labels', verb_from_repertoire['labels'])
+                    if verb_from_repertoire['notes']:
+                        manager.write_attribute(element, 'notes', verb_from_repertoire['notes'])
+
+        # 统计基础动词变位的常用次数（目录库中的动词按 caracterisation 指向基础动词）
+        # stat_dict = manager.value_counts('caracterisation')
+        # stat_dict.pop('', None)
         # print(sorted(stat_dict.items(), key=lambda kv: (kv[1], kv[0]), reverse=True))
 
 
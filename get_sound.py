@@ -1,165 +1,39 @@
 import os
-import csv
 import requests
 import json
-from urllib.parse import urlparse
-from time import sleep
+from time import sleep, monotonic, time
 from gtts import gTTS, gTTSError
-import uuid
-
-class CSVAttributeManager:
-    def __init__(self, csv_file):
-        self.csv_file = csv_file
-        self.data = {}
-        self.elements = []
-        self.attributes = []
-        self._load_data()
-
-    def _load_data(self):
-        """从CSV文件加载数据到内存"""
-        if not os.path.exists(self.csv_file):
-            # 如果文件不存在，创建空的数据结构
-            self.data = {}
-            self.elements = []
-            self.attributes = []
-            return
-
-        with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            rows = list(reader)
-
-            if not rows:
-                self.data = {}
-                self.elements = []
-                self.attributes = []
-                return
-
-            # 第一行是属性名（第一列为空）
-            self.attributes = rows[0][1:]
-
-            # 读取数据
-            self.elements = []
-            self.data = {}
-
-            for row in rows[1:]:
-                if row:  # 跳过空行
-                    element = row[0]
-                    self.elements.append(element)
-                    self.data[element] = {}
-
-                    for i, attr_value in enumerate(row[1:]):
-                        if i < len(self.attributes):
-                            attr_name = self.attributes[i]
-                            self.data[element][attr_name] = attr_value
-
-    def _save_data(self):
-        """将数据保存回CSV文件"""
-        with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-
-            # 写入属性行
-            writer.writerow([''] + self.attributes)
-
-            # 写入数据行
-            for element in self.elements:
-                row = [element]
-                for attr in self.attributes:
-                    row.append(self.data.get(element, {}).get(attr, ''))
-                writer.writerow(row)
-
-    def read_attribute(self, element, attribute):
-        """读取指定元素的指定属性值"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        return self.data[element].get(attribute, '')
-
-    def write_attribute(self, element, attribute, value):
-        """写入指定元素的指定属性值"""
-        # 如果元素不存在，创建新元素
-        if element not in self.data:
-            self.elements.append(element)
-            self.data[element] = {}
-
-        # 如果属性不存在，添加到属性列表
-        if attribute not in self.attributes:
-            self.attributes.append(attribute)
-            # 为所有现有元素添加这个新属性
-            for existing_element in self.elements:
-                if existing_element != element:
-                    self.data[existing_element][attribute] = ''
-
-        # 设置属性值
-        self.data[element][attribute] = str(value)
-        self._save_data()
-
-    def add_element(self, element):
-        """添加新元素"""
-        if element in self.data:
-            raise ValueError(f"元素 '{element}' 已存在")
-
-        self.elements.append(element)
-        self.data[element] = {attr: '' for attr in self.attributes}
-        self._save_data()
-
-    def add_attribute(self, attribute):
-        """添加新属性"""
-        if attribute in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 已存在")
-
-        self.attributes.append(attribute)
-        for element in self.elements:
-            self.data[element][attribute] = ''
-        self._save_data()
-
-    def get_all_elements(self):
-        """获取所有元素列表"""
-        return self.elements.copy()
-
-    def get_all_attributes(self):
-        """获取所有属性列表"""
-        return self.attributes.copy()
-
-    def get_element_data(self, element):
-        """获取元素的所有属性数据"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-        return self.data[element].copy()
-
-    def delete_element(self, element):
-        """删除元素"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        self.elements.remove(element)
-        del self.data[element]
-        self._save_data()
-
-    def delete_attribute(self, attribute):
-        """删除属性"""
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        self.attributes.remove(attribute)
-        for element in self.elements:
-            if attribute in self.data[element]:
-                del self.data[element][attribute]
-        self._save_data()
-
-
-def download_file(url, save_path):
+import shutil
+import subprocess
+import heapq
+import random
+import hashlib
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from sqlite_attribute_manager import open_manager, manager_class
+from http_client import HTTPClient, AIMDController, THROTTLE_STATUS, backoff_delay, default_client
+
+SOUNDOFTEXT_URL = "https://api.soundoftext.com/sounds"
+# soundoftext 上还没取回的任务，中断后下次运行接着轮询
+PENDING_FILE = "soundoftext_pending.json"
+# 离线合成用的 espeak-ng 程序和法语声音
+ESPEAK = "espeak-ng"
+ESPEAK_VOICE = "fr"
+# 可以选的后端，每个都是按完成顺序产出 (键, ret, 文件名) 的生成器，见 open_backend
+TTS_BACKENDS = ("gtts", "soundoftext", "espeak")
+
+def download_file(url, save_path, client=None):
     try:
-        # Send GET request to the URL
-        response = requests.get(url)
+        # Send GET request to the URL (shared keep-alive session, retried on 429/5xx)
+        response = (client or default_client()).get(url)
 
         # Check if the request was successful (status code 200)
         if response.status_code == 200:
-            # Write the content of the response to a local file
-            with open(save_path, 'wb') as file:
+            # Write the content of the response to a local file (renamed into place once complete)
+            with open(f"{save_path}.tmp", 'wb') as file:
                 file.write(response.content)
+            os.replace(f"{save_path}.tmp", save_path)
             print(f"File downloaded successfully: {save_path}")
             return 0
         else:
@@ -169,21 +43,42 @@ def download_file(url, save_path):
         print(f"Error: {e}")
         return 1
 
-def gtts(text):
-    try:
-        tts = gTTS(text, lang='fr')
-        file_name = f"{str(uuid.uuid1())}.mp3"
-        tts.save(f'sound_download_g/fr-conj-{file_name}')
-        print(f"gTTS File downloaded successfully: {file_name}")
+def gtts(text, retries=3, controller=None, file_name=None):
+    # gTTS 自己发请求，没法用共享的客户端，失败时同样按指数退避加抖动重试
+    # 传入 controller（AIMDController）时每次请求占一个并发名额，被限流时并发数自动降下来
+    # 文件名默认由 audio_key 决定，文件已经存在就直接复用，不再生成
+    if file_name is None:
+        file_name = f"{audio_key(text)}.mp3"
+    save_path = f'sound_download_g/fr-conj-{file_name}'
+    if os.path.exists(save_path):
+        print(f"gTTS File already exists: {file_name}")
         return 0, file_name
-    except gTTSError as e:
-        print(f"gTTS error: {e}")
-        sleep(10)
-        return 1, None
 
-
-def tts(text):
-    url = "https://api.soundoftext.com/sounds"
+    for attempt in range(retries + 1):
+        started = controller.acquire() if controller else None
+        outcome = "error"
+        try:
+            tts = gTTS(text, lang='fr')
+            # 先写临时文件，写完再改名，中途中断不会留下半个文件被当成已生成
+            tts.save(f'{save_path}.tmp')
+            os.replace(f'{save_path}.tmp', save_path)
+            print(f"gTTS File downloaded successfully: {file_name}")
+            outcome = "success"
+            return 0, file_name
+        except gTTSError as e:
+            if e.rsp is not None and e.rsp.status_code in THROTTLE_STATUS:
+                outcome = "throttled"
+            print(f"gTTS error: {e}")
+        finally:
+            if controller:
+                controller.release(started, outcome)
+        if attempt < retries:
+            sleep(backoff_delay(attempt, base=5.0))
+    return 1, None
+
+
+def submit_sound(text, client):
+    """向 soundoftext 提交一个合成任务，返回 sound_id，提交失败时返回 None"""
     payload = {
         "engine": "Google",
         "data": {
@@ -195,34 +90,136 @@ def tts(text):
         "Content-Type": "application/json"
     }
     try:
-        fulfill_post = requests.post(url, json=payload, headers=headers)
-        if fulfill_post.json()["success"]:
-            sound_id = fulfill_post.json()["id"]
-            sleep(2)
-            download_request = requests.get(f"{url}/{sound_id}")
-            if download_request.json()["status"] == "Done":
-                file_url = download_request.json()["location"]
-                url_tuple = urlparse(file_url)
-                save_path = f"sound_download/fr-conj-{url_tuple.path[1:]}"
-                ret = download_file(file_url, save_path)
-                return ret, url_tuple.path
-            elif download_request.json()["status"] == "Pending":
-                print(f"声音文件暂未生成，稍后再试。sound_id：{sound_id}")
-                return 1, None
-            elif download_request.json()["status"] == "Error":
-                print(f"声音下载失败，返回消息为：{download_request.json()["message"]}")
-                return 1, None
-        else:
-            print(f"post 失败，返回消息为：{fulfill_post.json()["message"]}")
-            return 1, None
+        fulfill_post = client.post(SOUNDOFTEXT_URL, json=payload, headers=headers).json()
+        if fulfill_post["success"]:
+            return fulfill_post["id"]
+        print(f"post 失败，返回消息为：{fulfill_post.get('message')}")
     except requests.exceptions.RequestException as e:
+        # 客户端已经退避重试过了，到这里说明重试用完或者熔断了
         print(f"网络请求错误: {e}")
-        print("等待两分钟……")
-        sleep(120)
-        return 1, None
-    except ValueError as e:
+    except (ValueError, KeyError) as e:
         print(f"JSON解析错误: {e}")
-        return 1, None
+    return None
+
+
+def poll_sound(sound_id, client):
+    """
+    查询任务状态，返回服务器的 JSON。网络错误（客户端已经重试过）当作还在生成，下次再问；
+    服务器返回错误状态码或者不是 JSON（例如服务器已经不认识这个 sound_id）时当作失败
+    """
+    try:
+        response = client.get(f"{SOUNDOFTEXT_URL}/{sound_id}")
+    except requests.exceptions.RequestException as e:
+        print(f"网络请求错误: {e}")
+        return {"status": "Pending"}
+    if not response.ok:
+        return {"status": "Error", "message": f"状态码 {response.status_code}"}
+    try:
+        return response.json()
+    except ValueError as e:
+        return {"status": "Error", "message": f"JSON解析错误: {e}"}
+
+
+def load_pending(pending_file):
+    """读取上次没等到结果的任务：{sound_id: {"key": 键, "attempt": 已轮询次数, "submitted": 提交时间}}"""
+    try:
+        with open(pending_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_pending(pending, pending_file):
+    with open(f"{pending_file}.tmp", 'w', encoding='utf-8') as file:
+        json.dump(pending, file, ensure_ascii=False)
+    os.replace(f"{pending_file}.tmp", pending_file)
+
+
+def tts_many(jobs, client=None, max_in_flight=8, workers=4, poll_base=1.0, poll_cap=60.0,
+             max_polls=15, max_age=3600.0, pending_file=PENDING_FILE):
+    """
+    soundoftext 批量合成，提交和取回分开：最多 max_in_flight 个任务同时在服务器上生成，
+    还没生成好的按指数退避轮询，生成好一个就在下载线程里下载一个。
+    jobs 是 {键: 文本}，文件保存为 sound_download/fr-conj-<键>.mp3，按完成顺序产出 (键, ret, 文件名)。
+    服务器上还没完成的 sound_id 存在 pending_file 里，中断后再运行会接着轮询，不重新提交。
+    一个 sound_id 轮询超过 max_polls 次或者提交超过 max_age 秒还没生成好，就放弃，算作失败。
+    """
+    client = client or default_client()
+    # 上次留下的任务这次只轮询需要的，其余的原样留在文件里，留给以后的运行
+    pending, others = {}, {}
+    for sound_id, entry in load_pending(pending_file).items():
+        (pending if entry["key"] in jobs else others)[sound_id] = entry
+    schedule = [(monotonic(), sound_id) for sound_id in pending]
+    heapq.heapify(schedule)
+    on_server = {entry["key"] for entry in pending.values()}
+    to_submit = deque(key for key in jobs if key not in on_server)
+    if pending:
+        print(f"接着轮询上次提交的 {len(pending)} 个任务")
+
+    downloads = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while to_submit or schedule or downloads:
+            # 提交新任务，直到服务器上同时生成的任务数达到上限
+            while to_submit and len(pending) < max_in_flight:
+                key = to_submit.popleft()
+                if os.path.exists(f"sound_download/fr-conj-{key}.mp3"):
+                    yield key, 0, f"{key}.mp3"
+                    continue
+                sound_id = submit_sound(jobs[key], client)
+                if sound_id is None:
+                    yield key, 1, None
+                    continue
+                pending[sound_id] = {"key": key, "attempt": 0, "submitted": time()}
+                save_pending({**others, **pending}, pending_file)
+                heapq.heappush(schedule, (monotonic() + poll_base, sound_id))
+
+            # 轮询所有到期的任务
+            while schedule and schedule[0][0] <= monotonic():
+                _, sound_id = heapq.heappop(schedule)
+                entry = pending[sound_id]
+                download_request = poll_sound(sound_id, client)
+                entry["attempt"] += 1
+                if download_request.get("status") == "Pending" and (
+                        entry["attempt"] >= max_polls or time() - entry.get("submitted", time()) > max_age):
+                    download_request = {"status": "Error", "message": f"轮询 {entry['attempt']} 次还没生成好，放弃"}
+                if download_request.get("status") == "Pending":
+                    delay = min(poll_cap, poll_base * 2 ** entry["attempt"]) * random.uniform(0.5, 1)
+                    heapq.heappush(schedule, (monotonic() + delay, sound_id))
+                else:
+                    del pending[sound_id]
+                    if download_request.get("status") == "Done" and download_request.get("location"):
+                        save_path = f"sound_download/fr-conj-{entry['key']}.mp3"
+                        future = executor.submit(download_file, download_request["location"], save_path, client)
+                        downloads[future] = entry["key"]
+                    else:
+                        print(f"声音下载失败，返回消息为：{download_request.get('message')}")
+                        yield entry["key"], 1, None
+                save_pending({**others, **pending}, pending_file)
+
+            # 交出下载好的，没有的话等到下一次轮询或者有下载完成
+            finished = [future for future in downloads if future.done()]
+            for future in finished:
+                key = downloads.pop(future)
+                ret = future.result()
+                yield key, ret, f"{key}.mp3" if ret == 0 else None
+            if not finished and not (to_submit and len(pending) < max_in_flight):
+                timeout = max(0.0, schedule[0][0] - monotonic()) if schedule else None
+                if downloads:
+                    wait(downloads, timeout=timeout, return_when=FIRST_COMPLETED)
+                elif timeout:
+                    sleep(timeout)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def tts(text, client=None):
+    """用 soundoftext 合成一个声音，返回 (ret, 文件名)"""
+    # 和其他后端一样按 audio_key 命名，读音相同的文本不管用哪个后端都对应同一个文件名
+    key = audio_key(text)
+    for _, ret, path in tts_many({key: text}, client):
+        return ret, path
+    return 1, None
 
 verbe_attribute = [
     # INDICATIF
@@ -309,33 +306,171 @@ def split_3sp(combine_str):
         else:
             return combine_str
 
-def main():
-    conjugation_csv = "conjugations_to_anki.csv"
-    manager = CSVAttributeManager(conjugation_csv)
+def audio_key(text):
+    """
+    声音的键：split_3sp 展开后规范化（Unicode NFC、统一撇号、合并空白）再取哈希，
+    读出来一样的文本得到同一个键，声音只生成一次，文件名也由它决定
+    """
+    spoken = unicodedata.normalize("NFC", split_3sp(text)).replace("'", "’")
+    spoken = " ".join(spoken.split())
+    return hashlib.sha256(spoken.encode('utf-8')).hexdigest()[:20]
+
+def audio_columns():
+    """get_sound 需要的列：每个变位和它对应的声音"""
+    return verbe_attribute + [f"{attribute}_audio" for attribute in verbe_attribute]
+
+def write_back(manager, results):
+    """把生成好的声音一次写回表格，results 是 [(动词, 属性, 值)]"""
+    if not results:
+        return
+    with manager.batch():
+        for verb, attribute, value in results:
+            manager.write_attribute(verb, attribute, value)
+
+
+def gtts_many(texts, controller=None, workers=4, retries=3):
+    """多个线程同时用 gTTS 生成，texts 是 {键: 文本}，按完成顺序产出 (键, ret, 文件名)"""
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {executor.submit(gtts, text, retries, controller, f"{key}.mp3"): key for key, text in texts.items()}
+    try:
+        for future in as_completed(futures):
+            ret, path = future.result()
+            yield futures[future], ret, path
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def espeak(text, file_name, voice=ESPEAK_VOICE, speed=150):
+    """用本地的 espeak-ng 合成一个 wav 声音，不需要网络，文件已经存在时直接复用"""
+    save_path = f'sound_download_e/fr-conj-{file_name}'
+    if os.path.exists(save_path):
+        return 0, file_name
+    try:
+        # 文本从标准输入传进去，以 - 开头的文本不会被当成参数
+        subprocess.run([ESPEAK, "-v", voice, "-s", str(speed), "-w", f"{save_path}.tmp", "--stdin"],
+                       input=text, text=True, capture_output=True, check=True, timeout=60)
+        os.replace(f"{save_path}.tmp", save_path)
+        return 0, file_name
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"espeak error: {e}")
+        return 1, None
+
 
-    for verb in manager.elements:
-        for attribute in verbe_attribute:
-            text = manager.read_attribute(verb, attribute)
-            sound = manager.read_attribute(verb, f"{attribute}_audio")
-            if text and not sound:
-                ret, path = gtts(split_3sp(text))
+def espeak_many(texts, workers=None):
+    """
+    离线批量合成，texts 是 {键: 文本}，按完成顺序产出 (键, ret, 文件名)。
+    合成在 espeak-ng 子进程里进行，这里只用线程等待它们，workers 默认等于 CPU 核数。
+    """
+    os.makedirs("sound_download_e", exist_ok=True)
+    executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+    futures = {executor.submit(espeak, text, f"{key}.wav"): key for key, text in texts.items()}
+    try:
+        for future in as_completed(futures):
+            ret, path = future.result()
+            yield futures[future], ret, path
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def open_backend(backend, texts, controller=None, workers=4, retries=3, max_in_flight=8):
+    """按名字选后端，返回按完成顺序产出 (键, ret, 文件名) 的生成器，ret 为 0 表示成功"""
+    if backend == "gtts":
+        return gtts_many(texts, controller, workers, retries)
+    if backend == "soundoftext":
+        client = HTTPClient(pool_size=workers, controller=controller)
+        return tts_many(texts, client, max_in_flight=max_in_flight, workers=workers)
+    if backend == "espeak":
+        # 本地合成不受限流，线程数跟着 CPU 核数走
+        return espeak_many(texts)
+    raise ValueError(f"未知的后端：{backend}，可选 {', '.join(TTS_BACKENDS)}")
+
+
+def main(workers=4, batch_size=100, retries=3, backend="gtts", max_in_flight=8,
+         conjugation_file="conjugations_to_anki.csv"):
+    """
+    workers：同时生成（或下载）声音的线程数，也是并发窗口的上限；
+    batch_size：每生成多少个声音写回一次表格；retries：每个声音失败后最多重试几次（gTTS）；
+    backend："gtts"、"soundoftext" 或 "espeak"（离线，用 espeak-ng 在所有 CPU 核上合成 wav）；
+    max_in_flight：soundoftext 上同时生成的任务数上限；
+    conjugation_file：anki 列表，以 .sqlite/.db 结尾时用 SQLiteAttributeManager。
+    """
+    if backend == "espeak" and shutil.which(ESPEAK) is None:
+        print(f"没有找到 {ESPEAK}，请先安装（例如 apt install espeak-ng）")
+        return
+    # 日志模式：每批声音只往日志里追加一次，中途被打断也不会丢掉已经写回的声音
+    # 只加载变位和对应的声音两类列，其余列保存时原样写回
+    manager = open_manager(conjugation_file, journal=True, columns=audio_columns())
+
+    try:
+        # 已有的声音按键建索引，新单元格的文本读音相同时直接复用
+        index = {}
+        jobs = {}  # 键 -> (要读的文本, [(动词, 属性)])
+        reused = []
+        for verb in manager.elements:
+            for attribute in verbe_attribute:
+                text = manager.read_attribute(verb, attribute)
+                sound = manager.read_attribute(verb, f"{attribute}_audio")
+                if text and sound:
+                    index.setdefault(audio_key(text), sound)
+                # if text == ".":
+                #     manager.write_attribute(verb, f"{attribute}", "")
+                #     manager.write_attribute(verb, f"{attribute}_audio", "")
+                #     print(f"delete . of verb: {verb}, attr: {attribute}, text: {text}, sound: {sound}")
+        for verb in manager.elements:
+            for attribute in verbe_attribute:
+                text = manager.read_attribute(verb, attribute)
+                if not text or manager.read_attribute(verb, f"{attribute}_audio"):
+                    continue
+                key = audio_key(text)
+                if key in index:
+                    reused.append((verb, f"{attribute}_audio", index[key]))
+                else:
+                    jobs.setdefault(key, (split_3sp(text), []))[1].append((verb, attribute))
+        write_back(manager, reused)
+        cells = sum(len(targets) for _, targets in jobs.values())
+        print(f"复用已有声音 {len(reused)} 个单元格；需要生成 {len(jobs)} 个声音，对应 {cells} 个单元格")
+
+        # 实际并发数由 AIMDController 按限流情况调整；结果攒够一批再写回
+        # 文件名由键决定，重复运行时已经生成过的文件直接复用
+        controller = AIMDController(initial=min(2, workers), max_window=workers)
+        texts = {key: spoken for key, (spoken, _) in jobs.items()}
+        produced = open_backend(backend, texts, controller, workers, retries, max_in_flight)
+        results = []
+        finished = failed = 0
+        try:
+            for key, ret, path in produced:
+                finished += 1
                 if ret == 0 and path:
                     path = path.replace("/", "")
-                    manager.write_attribute(verb, f"{attribute}_audio", f"[sound:fr-conj-{path}]")
-            # if text == ".":
-            #     manager.write_attribute(verb, f"{attribute}", "")
-            #     manager.write_attribute(verb, f"{attribute}_audio", "")
-            #     print(f"delete . of verb: {verb}, attr: {attribute}, text: {text}, sound: {sound}")
-
-def small_fix():
-    conjugation_csv = "conjugations_to_anki.csv"
-    manager = CSVAttributeManager(conjugation_csv)
-
-    for verb in manager.elements:
-        for attribute in verbe_attribute:
-            text = manager.read_attribute(verb, attribute)
-            if "(e," in text:
-                manager.write_attribute(verb, f"{attribute}_audio", "")
+                    for verb, attribute in jobs[key][1]:
+                        results.append((verb, f"{attribute}_audio", f"[sound:fr-conj-{path}]"))
+                else:
+                    failed += 1
+                if len(results) >= batch_size:
+                    write_back(manager, results)
+                    results = []
+                    print(f"进度 {finished}/{len(jobs)}，失败 {failed} 个，并发窗口 {controller.window:.1f}")
+        finally:
+            # 中途退出时不再开始新的任务，已经生成的声音照样写回
+            produced.close()
+            write_back(manager, results)
+    finally:
+        manager.compact()
+
+def small_fix(conjugation_file="conjugations_to_anki.csv"):
+
+    # 先流式扫描出需要清空声音的单元格，有需要修改的再加载表格
+    to_clear = []
+    for verb, attribute, text in manager_class(conjugation_file).iter_cells(conjugation_file, columns=verbe_attribute):
+        if "(e," in text:
+            to_clear.append((verb, f"{attribute}_audio"))
+    if not to_clear:
+        return
+
+    manager = open_manager(conjugation_file, columns=[attribute for _, attribute in to_clear])
+    with manager.batch():
+        for verb, attribute in to_clear:
+            manager.write_attribute(verb, attribute, "")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,401 @@
+import os
+import gzip
+import json
+import random
+import hashlib
+import threading
+from time import sleep, monotonic, time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# 这些状态码说明服务器暂时忙或出错，值得退避后重试
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# 其中这些说明是我们请求太快被限流了
+THROTTLE_STATUS = (429, 503)
+
+
+# 网页缓存默认放在当前目录下
+CACHE_DIR = "http_cache"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """某个域名连续失败太多次，熔断期间不再发请求"""
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """离线模式下要的网页不在缓存里"""
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """第 attempt 次重试前等待的秒数：指数退避加全抖动"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """令牌桶限速：平均每秒 rate 个请求，最多攒 capacity 个令牌应对突发，多线程安全"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，没有令牌时等到有为止"""
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+
+class HostRateLimiter:
+    """按域名分别限速，每个域名一个令牌桶"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.capacity)
+            bucket = self.buckets[host]
+        bucket.acquire()
+
+
+class AIMDController:
+    """
+    AIMD 自适应并发：同时进行的请求数不超过窗口 window。
+    请求成功且延迟正常时窗口慢慢变大（每满一个窗口的成功请求加 1）；
+    遇到限流（429/503）、其他错误，或者延迟超过最低延迟的 latency_factor 倍时窗口乘以 decrease。
+    同一轮拥塞里发出的请求（在上次缩小窗口之前就开始的）不会让窗口重复缩小。
+    """
+
+    def __init__(self, initial=4, min_window=1, max_window=64, decrease=0.5, latency_factor=3.0):
+        self.window = float(initial)
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.base_latency = None
+        self.last_decrease = 0.0
+        self.counts = {"success": 0, "slow": 0, "throttled": 0, "error": 0}
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """占一个并发名额，窗口满了就等，返回开始时间，请求结束后交给 release"""
+        with self.condition:
+            while self.in_flight >= int(self.window):
+                self.condition.wait()
+            self.in_flight += 1
+            return monotonic()
+
+    def release(self, started, outcome="success"):
+        """释放名额并根据结果调整窗口，outcome 是 success、throttled 或 error"""
+        with self.condition:
+            self.in_flight -= 1
+            now = monotonic()
+            latency = now - started
+            if outcome == "success":
+                if self.base_latency is None or latency < self.base_latency:
+                    self.base_latency = latency
+                else:
+                    # 最低延迟慢慢向当前延迟靠拢，服务器整体变慢时不至于一直判定为拥塞
+                    self.base_latency += (latency - self.base_latency) * 0.01
+                if latency > self.latency_factor * self.base_latency:
+                    outcome = "slow"
+            self.counts[outcome] += 1
+
+            if outcome == "success":
+                self.window = min(self.max_window, self.window + 1 / self.window)
+            elif started >= self.last_decrease:
+                self.window = max(self.min_window, self.window * self.decrease)
+                self.last_decrease = now
+            self.condition.notify_all()
+
+    def metrics(self):
+        """当前窗口、进行中的请求数和各种结果的次数"""
+        with self.condition:
+            return {"window": self.window, "in_flight": self.in_flight,
+                    "base_latency": self.base_latency, **self.counts}
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续 threshold 个请求失败后断开 cooldown 秒，之后放一个请求试探，成功再恢复。
+    一个请求不管重试了几次只算一次，只有一个网址一直出错时不会把整个域名断开
+    """
+
+    def __init__(self, threshold=5, cooldown=60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """现在能不能发请求"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if monotonic() - self.opened_at >= self.cooldown:
+                # 半开：放一个请求过去试探，失败会重新计时
+                self.opened_at = monotonic()
+                return True
+            return False
+
+    def remaining(self):
+        """断开状态下还要等多少秒才能试探，没有断开时为 0"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (monotonic() - self.opened_at))
+
+    def record(self, success):
+        with self.lock:
+            if success:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = monotonic()
+
+
+class ResponseCache:
+    """
+    网页的本地缓存，按网址的哈希存放：
+    <哈希>.gz 是 gzip 压缩后的正文，<哈希>.json 记录网址、编码、ETag 和 Last-Modified。
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _write(self, path, data):
+        """先写临时文件再替换，多线程同时写同一个网址也不会写坏"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """返回 (元数据, 正文)，没有缓存时返回 None"""
+        try:
+            with open(self._path(url, ".json"), 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(self._path(url, ".gz"), 'rb') as file:
+                body = gzip.decompress(file.read())
+        except (OSError, ValueError, EOFError):
+            return None
+        return meta, body
+
+    def put(self, url, response):
+        """缓存一个成功的响应，按请求时的网址存放（有重定向时也一样）"""
+        meta = {
+            "url": url,
+            "encoding": response.encoding,
+            "content_type": response.headers.get("Content-Type"),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time(),
+        }
+        # 先写正文再写元数据，元数据在就说明正文完整
+        self._write(self._path(url, ".gz"), gzip.compress(response.content))
+        self._write(self._path(url, ".json"), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def touch(self, url, meta):
+        """服务器返回 304 时只更新抓取时间"""
+        meta["fetched"] = time()
+        self._write(self._path(url, ".json"), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def urls(self):
+        """缓存里的所有网址"""
+        for name in sorted(os.listdir(self.cache_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.cache_dir, name), 'r', encoding='utf-8') as file:
+                    yield json.load(file)["url"]
+
+    @staticmethod
+    def response(url, meta, body):
+        """把缓存内容包装成 requests.Response，调用方不用区分是不是来自缓存"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = meta.get("encoding")
+        response._content = body
+        response.headers = CaseInsensitiveDict()
+        if meta.get("content_type"):
+            response.headers["Content-Type"] = meta["content_type"]
+        response.from_cache = True
+        return response
+
+
+class HTTPClient:
+    """
+    所有脚本共用的 HTTP 客户端：
+    - 同一个 Session 复用连接（keep-alive 连接池）
+    - 每个请求都有超时
+    - 遇到 429/5xx 和网络错误时指数退避加抖动重试，有 Retry-After 时按它等待
+    - 每个域名一个熔断器，连续多个请求失败后暂停请求；breaker_wait=True 时等熔断器恢复再发，
+      否则直接抛出 CircuitOpenError
+    - 传入 cache 时 GET 请求走本地缓存，带 If-None-Match/If-Modified-Since 询问网页有没有变；
+      offline=True 时只读缓存，不发任何请求
+    - 传入 controller（AIMDController）时按服务器的反应自动调整同时进行的请求数
+    """
+
+    def __init__(self, timeout=(10, 30), retries=4, backoff=1.0, max_backoff=60.0,
+                 breaker_threshold=5, breaker_cooldown=60.0, pool_size=10, limiter=None,
+                 cache=None, offline=False, controller=None, breaker_wait=True):
+        if offline and cache is None:
+            raise ValueError("离线模式需要提供缓存")
+        self.cache = cache
+        self.offline = offline
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_wait = breaker_wait
+        self.limiter = limiter
+        self.controller = controller
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _breaker(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[host]
+
+    def _retry_after(self, response, attempt):
+        """下次重试前等待的秒数，服务器给了 Retry-After（秒数）就按它来"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.max_backoff, int(retry_after))
+        return backoff_delay(attempt, self.backoff, self.max_backoff)
+
+    @staticmethod
+    def _outcome(response):
+        """把一次请求的结果归类，交给 AIMDController"""
+        if response is None:
+            return "error"
+        if response.status_code in THROTTLE_STATUS:
+            return "throttled"
+        if response.status_code in RETRY_STATUS:
+            return "error"
+        return "success"
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求，失败时自动重试。
+        重试用完时：最后一次有响应就返回这个响应，否则抛出最后一次的网络异常。
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        breaker = self._breaker(url)
+        for attempt in range(self.retries + 1):
+            self._wait_for_breaker(breaker, url)
+            if self.limiter:
+                self.limiter.acquire(url)
+
+            response = None
+            started = self.controller.acquire() if self.controller else None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException:
+                if attempt == self.retries:
+                    # 熔断器按请求计数，重试用完才算这个请求失败
+                    breaker.record(False)
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    breaker.record(True)
+                    return response
+                if attempt == self.retries:
+                    breaker.record(False)
+                    return response
+            finally:
+                if self.controller:
+                    self.controller.release(started, self._outcome(response))
+
+            sleep(self._retry_after(response, attempt))
+
+    def _wait_for_breaker(self, breaker, url):
+        """熔断器断开时等它到试探的时候再发；breaker_wait=False 时直接抛出 CircuitOpenError"""
+        while not breaker.allow():
+            if not self.breaker_wait:
+                raise CircuitOpenError(f"{urlparse(url).netloc} 连续失败太多次，暂停请求")
+            # 同时等着的请求只有一个能去试探，其余的接着等
+            sleep(max(breaker.remaining(), 0.05))
+
+    def get(self, url, **kwargs):
+        if self.cache is None:
+            return self.request("GET", url, **kwargs)
+
+        cached = self.cache.get(url)
+        if self.offline:
+            if cached is None:
+                raise CacheMissError(f"缓存里没有 {url}")
+            return self.cache.response(url, *cached)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached:
+            meta, body = cached
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response = self.request("GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and cached:
+            self.cache.touch(url, meta)
+            return self.cache.response(url, meta, body)
+        if response.status_code == 200:
+            self.cache.put(url, response)
+        return response
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self):
+        """自适应并发的指标，没有 controller 时为空字典"""
+        return self.controller.metrics() if self.controller else {}
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """进程内共用的默认客户端，第一次用到时创建，同时进行的请求数自动调整"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HTTPClient(controller=AIMDController())
+        return _default_client
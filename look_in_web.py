@@ -1,153 +1,37 @@
 import os
-import csv
 import requests
 import json
-from urllib.parse import urlparse
-from time import sleep
+import re
+import multiprocessing
+from time import monotonic
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
 from bs4 import BeautifulSoup
 from bs4 import Comment
-
-class CSVAttributeManager:
-    def __init__(self, csv_file):
-        self.csv_file = csv_file
-        self.data = {}
-        self.elements = []
-        self.attributes = []
-        self._load_data()
-
-    def _load_data(self):
-        """从CSV文件加载数据到内存"""
-        if not os.path.exists(self.csv_file):
-            # 如果文件不存在，创建空的数据结构
-            self.data = {}
-            self.elements = []
-            self.attributes = []
-            return
-
-        with open(self.csv_file, 'r', newline='', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            rows = list(reader)
-
-            if not rows:
-                self.data = {}
-                self.elements = []
-                self.attributes = []
-                return
-
-            # 第一行是属性名（第一列为空）
-            self.attributes = rows[0][1:]
-
-            # 读取数据
-            self.elements = []
-            self.data = {}
-
-            for row in rows[1:]:
-                if row:  # 跳过空行
-                    element = row[0]
-                    self.elements.append(element)
-                    self.data[element] = {}
-
-                    for i, attr_value in enumerate(row[1:]):
-                        if i < len(self.attributes):
-                            attr_name = self.attributes[i]
-                            self.data[element][attr_name] = attr_value
-
-    def _save_data(self):
-        """将数据保存回CSV文件"""
-        with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-
-            # 写入属性行
-            writer.writerow([''] + self.attributes)
-
-            # 写入数据行
-            for element in self.elements:
-                row = [element]
-                for attr in self.attributes:
-                    row.append(self.data.get(element, {}).get(attr, ''))
-                writer.writerow(row)
-
-    def read_attribute(self, element, attribute):
-        """读取指定元素的指定属性值"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        return self.data[element].get(attribute, '')
-
-    def write_attribute(self, element, attribute, value):
-        """写入指定元素的指定属性值"""
-        # 如果元素不存在，创建新元素
-        if element not in self.data:
-            self.elements.append(element)
-            self.data[element] = {}
-
-        # 如果属性不存在，添加到属性列表
-        if attribute not in self.attributes:
-            self.attributes.append(attribute)
-            # 为所有现有元素添加这个新属性
-            for existing_element in self.elements:
-                if existing_element != element:
-                    self.data[existing_element][attribute] = ''
-
-        # 设置属性值
-        self.data[element][attribute] = str(value)
-        self._save_data()
-
-    def add_element(self, element):
-        """添加新元素"""
-        if element in self.data:
-            raise ValueError(f"元素 '{element}' 已存在")
-
-        self.elements.append(element)
-        self.data[element] = {attr: '' for attr in self.attributes}
-        self._save_data()
-
-    def add_attribute(self, attribute):
-        """添加新属性"""
-        if attribute in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 已存在")
-
-        self.attributes.append(attribute)
-        for element in self.elements:
-            self.data[element][attribute] = ''
-        self._save_data()
-
-    def get_all_elements(self):
-        """获取所有元素列表"""
-        return self.elements.copy()
-
-    def get_all_attributes(self):
-        """获取所有属性列表"""
-        return self.attributes.copy()
-
-    def get_element_data(self, element):
-        """获取元素的所有属性数据"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-        return self.data[element].copy()
-
-    def delete_element(self, element):
-        """删除元素"""
-        if element not in self.data:
-            raise ValueError(f"元素 '{element}' 不存在")
-
-        self.elements.remove(element)
-        del self.data[element]
-        self._save_data()
-
-    def delete_attribute(self, attribute):
-        """删除属性"""
-        if attribute not in self.attributes:
-            raise ValueError(f"属性 '{attribute}' 不存在")
-
-        self.attributes.remove(attribute)
-        for element in self.elements:
-            if attribute in self.data[element]:
-                del self.data[element][attribute]
-        self._save_data()
+from bs4 import SoupStrainer
+try:
+    import lxml
+except ImportError:  # 没装 lxml 时只能用 Python 自带的解析器
+    lxml = None
+from sqlite_attribute_manager import open_manager, manager_class
+from http_client import HTTPClient, HostRateLimiter, AIMDController, ResponseCache, CircuitOpenError, CACHE_DIR, \
+    default_client
+from crawl_queue import CrawlQueue, QUEUE_FILE, DONE, FAILED, PENDING
+
+BESCHERELLE_URL = "https://conjugaison.bescherelle.com/verbes/"
+
+# 目录库里同形动词的编号，如 asseoir(1)；地区标记，如 abader (helv)
+DUPLICATE_SUFFIX = re.compile(r"\(\d+\)$")
+REGION_SUFFIX = re.compile(r"\s+\([^()]*\)$")
+
+# BeautifulSoup 可用的解析器。lxml 快一些，但两者只在手工做的测试网页上比较过，
+# 在真实网页上用 benchmarks/bench_parsers.py 检查过之前，默认还是用 html.parser，需要时再手动选 lxml
+PARSERS = ("lxml", "html.parser")
+DEFAULT_PARSER = "html.parser"
+
+# 变位都在这个 div 里，只给它建树，导航、广告、页脚直接跳过
+CONJUGATION_CONTAINER = SoupStrainer("div", id="nav-tabContent-active-passive")
 
 verbe_attribute = [
     # INDICATIF
@@ -190,6 +74,37 @@ verbe_attribute = [
     'participe_present', 'participe_passe', 'participe_passe_compose',
 ]
 
+# 被动语态的变位，和主动语态一一对应，属性名前加 passif_
+PASSIVE_PREFIX = "passif_"
+passive_attribute = [f"{PASSIVE_PREFIX}{attribute}" for attribute in verbe_attribute]
+
+# (语式 div 的 class, h5 标题) -> 时态；要多解析一个时态只需在这里加一行
+SECTION_MAP = {
+    # 简单时态
+    ("indicatif-present", "Présent"): "indicatif_present",
+    ("indicatif-present", "Imparfait"): "indicatif_imparfait",
+    ("indicatif-present", "Passé simple"): "indicatif_passe_simple",
+    ("indicatif-present", "Futur simple"): "indicatif_futur_simple",
+    ("conditionnel-present", "Présent"): "conditionnel_present",
+    ("subjonctif-present", "Présent"): "subjonctif_present",
+    ("subjonctif-present", "Imparfait"): "subjonctif_imparfait",
+    ("imperatif-present", "Présent"): "imperatif_present",
+    ("infinitif-present", "Présent"): "infinitif_present",
+    ("participe-present", "Présent"): "participe_present",
+    # 复合时态
+    ("indicatif-passe", "Passé composé"): "indicatif_passe_compose",
+    ("indicatif-passe", "Plus-que-parfait"): "indicatif_plus_que_parfait",
+    ("indicatif-passe", "Passé antérieur"): "indicatif_passe_anterieur",
+    ("indicatif-passe", "Futur antérieur"): "indicatif_futur_anterieur",
+    ("conditionnel-passe", "Passé"): "conditionnel_passe",
+    ("subjonctif-passe", "Passé"): "subjonctif_passe",
+    ("subjonctif-passe", "Plus-que-parfait"): "subjonctif_plus_que_parfait",
+    ("imperatif-passe", "Passé"): "imperatif_passe",
+    ("infinitif-passe", "Passé"): "infinitif_passe",
+    ("participe-passe", "Passé"): "participe_passe",
+}
+MOOD_CLASSES = {mood for mood, _ in SECTION_MAP}
+
 def deal_with_conjugation(conjugation_data, item_title, section_soup):
     content_verb = section_soup.find_all("div", class_="content-verbe")[0]
     conjuctions = content_verb.find_all("div", class_="d-flex p-2")  # 不同的人称
@@ -262,153 +177,132 @@ def deal_with_conjugation(conjugation_data, item_title, section_soup):
                 continue
 
 
-def extract_verb_conjugation(html_content):
+def locate_sections(tab_content):
     """
-    从HTML内容中提取动词变位信息
+    遍历一次 tab_content，按 SECTION_MAP 找出每个时态所在的 div，返回 {时态: div}。
+    和原来一样，同一个语式只看第一个 div。
     """
     sections_dict = {}
-    soup = BeautifulSoup(html_content, 'html.parser')
-    for comment in soup.find_all(string = lambda text: isinstance(text, Comment)):
-        comment.extract()
-
-    # print(soup.prettify())
-    main_sections = soup.find_all("section", class_="section")
-    if len(main_sections) == 1:
-        main_section = main_sections[0]
-    else:
-        print("main sections 不止一个，请检查。")
-        return {}
+    first_mood_div = {}
+    for small_section in tab_content.find_all("div", class_="col-xs-12"):
+        # 往上找到所属的语式 div，一般只隔一两层
+        mood_div = small_section.parent
+        while mood_div is not tab_content and mood_div is not None:
+            mood = next((c for c in mood_div.get("class", ()) if c in MOOD_CLASSES), None)
+            if mood:
+                break
+            mood_div = mood_div.parent
+        else:
+            continue
+        if first_mood_div.setdefault(mood, mood_div) is not mood_div:
+            continue
 
-    article = main_section.article
-    all_conj = article.find_all("div", class_="tab-content", id="nav-tabContent-active-passive")[0]
-    active_conj = all_conj.find_all("div", class_="active")[0]
-    tab_content = active_conj.find_all("div", class_="tab-content")[0]
+        key = SECTION_MAP.get((mood, small_section.h5.string.strip()))
+        if key:
+            sections_dict[key] = small_section
+    return sections_dict
 
-    temp_simple = tab_content.find_all("div", class_="tab-pane")[0].find_all("div", class_="container-tabs")[0]
-
-    left_simple = temp_simple.find_all("div", class_="first-temps-simple")[0]
-    indicatif_list = left_simple.find_all("div", class_="indicatif-present")
-    if len(indicatif_list) > 0:
-        indicatif_list = indicatif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in indicatif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["indicatif_present"] = small_section
-            elif h5_text == "Imparfait":
-                sections_dict["indicatif_imparfait"] = small_section
-            elif h5_text == "Passé simple":
-                sections_dict["indicatif_passe_simple"] = small_section
-            elif h5_text == "Futur simple":
-                sections_dict["indicatif_futur_simple"] = small_section
-    conditionnel_list = left_simple.find_all("div", class_="conditionnel-present")
-    if len(conditionnel_list) > 0:
-        conditionnel_list = conditionnel_list[0].find_all("div", class_="col-xs-12")
-        for small_section in conditionnel_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["conditionnel_present"] = small_section
-
-    right_simple = temp_simple.find_all("div", class_="second-temps-simple")[0]
-    subjonctif_list = right_simple.find_all("div", class_="subjonctif-present")
-    if len(subjonctif_list) > 0:
-        subjonctif_list = subjonctif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in subjonctif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["subjonctif_present"] = small_section
-            elif h5_text == "Imparfait":
-                sections_dict["subjonctif_imparfait"] = small_section
-    imperatif_list = right_simple.find_all("div", class_="imperatif-present")
-    if len(imperatif_list) > 0:
-        imperatif_list = imperatif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in imperatif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["imperatif_present"] = small_section
-    infinitif_list = right_simple.find_all("div", class_="infinitif-present")
-    if len(infinitif_list) > 0:
-        infinitif_list = infinitif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in infinitif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["infinitif_present"] = small_section
-    participe_list = right_simple.find_all("div", class_="participe-present")
-    if len(participe_list) > 0:
-        participe_list = participe_list[0].find_all("div", class_="col-xs-12")
-        for small_section in participe_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Présent":
-                sections_dict["participe_present"] = small_section
-
-    temp_compose = tab_content.find_all("div", class_="tab-pane")[1]
-
-    left_compose = temp_compose.find_all("div", class_="first-temps-simple")[0]
-    indicatif_list = left_compose.find_all("div", class_="indicatif-passe")
-    if len(indicatif_list) > 0:
-        indicatif_list = indicatif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in indicatif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé composé":
-                sections_dict["indicatif_passe_compose"] = small_section
-            elif h5_text == "Plus-que-parfait":
-                sections_dict["indicatif_plus_que_parfait"] = small_section
-            elif h5_text == "Passé antérieur":
-                sections_dict["indicatif_passe_anterieur"] = small_section
-            elif h5_text == "Futur antérieur":
-                sections_dict["indicatif_futur_anterieur"] = small_section
-    conditionnel_list = left_compose.find_all("div", class_="conditionnel-passe")
-    if len(conditionnel_list) > 0:
-        conditionnel_list = conditionnel_list[0].find_all("div", class_="col-xs-12")
-        for small_section in conditionnel_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé":
-                sections_dict["conditionnel_passe"] = small_section
-
-    right_compose = temp_compose.find_all("div", class_="second-temps-simple")[0]
-    subjonctif_list = right_compose.find_all("div", class_="subjonctif-passe")
-    if len(subjonctif_list) > 0:
-        subjonctif_list = subjonctif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in subjonctif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé":
-                sections_dict["subjonctif_passe"] = small_section
-            elif h5_text == "Plus-que-parfait":
-                sections_dict["subjonctif_plus_que_parfait"] = small_section
-    imperatif_list = right_compose.find_all("div", class_="imperatif-passe")
-    if len(imperatif_list) > 0:
-        imperatif_list = imperatif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in imperatif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé":
-                sections_dict["imperatif_passe"] = small_section
-    infinitif_list = right_compose.find_all("div", class_="infinitif-passe")
-    if len(infinitif_list) > 0:
-        infinitif_list = infinitif_list[0].find_all("div", class_="col-xs-12")
-        for small_section in infinitif_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé":
-                sections_dict["infinitif_passe"] = small_section
-    participe_list = right_compose.find_all("div", class_="participe-passe")
-    if len(participe_list) > 0:
-        participe_list = participe_list[0].find_all("div", class_="col-xs-12")
-        for small_section in participe_list:
-            h5_text = small_section.h5.string.strip()
-            if h5_text == "Passé":
-                sections_dict["participe_passe"] = small_section
 
+def conjugations_of(tab_content):
+    """解析一个语态的 tab-content，返回 verbe_attribute 中每个属性的变位"""
     conjugation_data = {}
     for attr in verbe_attribute:
         conjugation_data[attr] = ""
 
-    for item_title, section_soup in sections_dict.items():
+    for item_title, section_soup in locate_sections(tab_content).items():
         deal_with_conjugation(conjugation_data, item_title, section_soup)
 
     return conjugation_data
 
-def look_in_web(url):
+
+def extract_verb_conjugation(html_content, parser=DEFAULT_PARSER, passive=False):
+    """
+    从HTML内容中提取动词变位信息，parser 是 PARSERS 中的一个。
+    passive=True 时同一次解析里把被动语态一起取出来，放在 passif_* 属性里；没有被动语态的动词这些属性为空。
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"不支持的解析器 '{parser}'，可选：{', '.join(PARSERS)}")
+
+    soup = BeautifulSoup(html_content, parser, parse_only=CONJUGATION_CONTAINER)
+    containers = soup.find_all("div", id="nav-tabContent-active-passive", recursive=False)
+    if len(containers) == 1:
+        all_conj = containers[0]
+    else:
+        print(f"找到 {len(containers)} 个变位区域，请检查。")
+        return {}
+    for comment in all_conj.find_all(string = lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    active_conj = all_conj.find_all("div", class_="active")[0]
+    tab_content = active_conj.find_all("div", class_="tab-content")[0]
+    conjugation_data = conjugations_of(tab_content)
+
+    if passive:
+        for attr in passive_attribute:
+            conjugation_data[attr] = ""
+        # 主动、被动两个语态是并列的 tab-pane，不带 active 的那个是被动语态
+        for voice in all_conj.find_all("div", class_="tab-pane", recursive=False):
+            if voice is active_conj:
+                continue
+            passive_tab = voice.find("div", class_="tab-content")
+            if passive_tab:
+                for attr, value in conjugations_of(passive_tab).items():
+                    conjugation_data[f"{PASSIVE_PREFIX}{attr}"] = value
+            break
+
+    return conjugation_data
+
+def fetch_page(url, client=None):
+    """只抓取网页，返回 HTML 文本，网络错误时抛出异常"""
+    r = (client or default_client()).get(url)
+    r.raise_for_status()
+    return r.text
+
+
+def fetch_and_submit(url, client, parse_pool, parser, passive):
+    """抓取线程里运行：抓到网页后交给解析进程池，不等解析完就返回，返回解析结果的 future"""
+    html = fetch_page(url, client)
+    if parse_pool is None:
+        # 不用进程池时直接在抓取线程里解析
+        future = Future()
+        future.set_result(extract_verb_conjugation(html, parser, passive))
+        return future
+    return parse_pool.submit(extract_verb_conjugation, html, parser, passive)
+
+
+def pipeline(jobs, client, fetch_pool, parse_pool, parser, passive, queue_size):
+    """
+    抓取 -> 解析 -> 写入的流水线：抓取在线程池里，解析在进程池里，写入由调用方在一个线程里完成。
+    最多有 queue_size 个动词处在“已开始抓取、还没写入”的状态，按 jobs 的顺序依次产出
+    ((动词, 网址), 变位, 异常)，变位和异常有且只有一个不为 None。
+    """
+    window = deque()
+    jobs = iter(jobs)
+
+    def submit_next():
+        job = next(jobs, None)
+        if job:
+            window.append((job, fetch_pool.submit(fetch_and_submit, job[1], client, parse_pool, parser, passive)))
+
+    for _ in range(queue_size):
+        submit_next()
+    while window:
+        job, fetch_future = window.popleft()
+        submit_next()
+        try:
+            yield job, fetch_future.result().result(), None
+        except Exception as e:
+            yield job, None, e
+
+
+def fetch_conjugation(url, client=None, parser=DEFAULT_PARSER, passive=False):
+    """抓取并解析一个动词页面，网络错误时抛出异常，页面里没有变位时返回空字典"""
+    return extract_verb_conjugation(fetch_page(url, client), parser, passive)
+
+
+def look_in_web(url, client=None, parser=DEFAULT_PARSER, passive=False):
     try:
-        r = requests.get(url)
-        conjugation_data = extract_verb_conjugation(r.text)
+        conjugation_data = fetch_conjugation(url, client, parser, passive)
         # for key, value in conjugation_data.items():
         #     print(f"{key}: {value}")
         return conjugation_data
@@ -416,68 +310,246 @@ def look_in_web(url):
         print(f"网络请求错误: {e}")
 
 
-def main(look_in_list):
-    conjugation_csv = "conjugations_to_anki.csv"
-    repertoire_csv = "french_verbs_conjugations.csv"
-    conjugation_manager = CSVAttributeManager(conjugation_csv)
-    repertoire_manager = CSVAttributeManager(repertoire_csv)
+def reparse_cache(cache_dir=CACHE_DIR, parser=DEFAULT_PARSER, passive=False):
+    """离线把缓存里的每个网页重新解析一遍，改了解析代码后用来检查，返回 {网址: 变位}"""
+    cache = ResponseCache(cache_dir)
+    client = HTTPClient(cache=cache, offline=True)
+    return {url: look_in_web(url, client, parser, passive) for url in cache.urls()}
 
+
+def verb_url(verb, base_url=BESCHERELLE_URL):
+    """
+    动词在 Bescherelle 上的网址：去掉重音符号、嘘音 h 的 *、空格和撇号，
+    去掉 (helv)、(québ) 这样的地区标记。
+    同形动词 asseoir(1)、asseoir(2) 的网址猜不出来（repartir-0 是 répartir 的页面，不是 repartir(2) 的），
+    返回 None，需要手填网址
+    """
+    verb = REGION_SUFFIX.sub("", verb)
+    if DUPLICATE_SUFFIX.search(verb):
+        return None
+    slug = verb\
+        .replace("â", "a").replace("ä", "a").replace("à", "a")\
+        .replace("é", "e").replace("è", "e").replace("ê", "e").replace("ë", "e")\
+        .replace("î", "i").replace("ï", "i").replace("ô", "o").replace("ö", "o")\
+        .replace("û", "u").replace("ç", "c").replace("œ", "oe").replace("*", "").replace(" ", "")\
+        .replace("’", "").replace("(", "").replace(")", "")
+    return f"{base_url}{slug}"
+
+
+def plan_from_list(look_in_list, anki_verbs, repertoire_verbs, queue, base_url):
+    """按手填的 look_in_list 规划要抓的动词，返回要加入或更新的 [(动词, 网址)]，跳过的动词都打印原因"""
+    new_jobs = []
     for verb, url in look_in_list.items():
         if not verb:
             continue
         if verb[0] == "h":
-            try:
-                caracterisation = repertoire_manager.read_attribute(verb, "caracterisation")
+            if verb in repertoire_verbs:
                 print(f"能在目录库中读到，是哑音 h 无需特殊处理")
-            except ValueError:
+            elif f"* {verb}" in repertoire_verbs:
                 verb = f"* {verb}"
-                try:
-                    caracterisation = repertoire_manager.read_attribute(verb, "caracterisation")
-                    print(f"嘘音 h 可以在目录库中读到，按 verb = {verb} 处理")
-                except ValueError:
-                    print(f"哑音、嘘音 h 也读不到，请检查，verb = {verb}")
-                    continue
+                print(f"嘘音 h 可以在目录库中读到，按 verb = {verb} 处理")
+            else:
+                print(f"哑音、嘘音 h 也读不到，请检查，verb = * {verb}")
+                continue
         if url == "":
-            url = f"https://conjugaison.bescherelle.com/verbes/{verb}"\
-                .replace("â", "a").replace("ä", "a").replace("à", "a")\
-                .replace("é", "e").replace("è", "e").replace("ê", "e").replace("ë", "e")\
-                .replace("î", "i").replace("ï", "i").replace("ô", "i").replace("ö", "i")\
-                .replace("û", "u").replace("ç", "c").replace("*", "").replace(" ", "")\
-                .replace("’", "")
-        try:
-            caracterisation = conjugation_manager.read_attribute(verb, "caracterisation")
+            url = verb_url(verb, base_url)
+            if url is None:
+                print(f"----------{verb} 是同形动词，猜不出网址，请手填")
+                continue
+        job = queue.job(verb)
+        if verb in anki_verbs:
             print(f"~~~~~~~~~~{verb} 可以在 conjugations_to_anki.csv 中读到，说明已经在 anki 列表中了，跳过")
-            continue
-        except ValueError:
-            # 这里才是预期
-            try:
-                caracterisation = repertoire_manager.read_attribute(verb, "caracterisation")
-                notes = repertoire_manager.read_attribute(verb, "notes")
-                labels = repertoire_manager.read_attribute(verb, "labels")
-                print(f"=========={verb} 读到：caracterisation = {caracterisation}, notes = {notes}, labels = {labels}, url = {url}")
-                conjugations = look_in_web(url)
-                if conjugations:
-                    conjugation_manager.write_attribute(verb, "caracterisation", caracterisation)
-                    conjugation_manager.write_attribute(verb, "notes", notes)
-                    conjugation_manager.write_attribute(verb, "labels", labels)
-                    for attr, value in conjugations.items():
-                        # print(f"{key}: {value}")
-                        conjugation_manager.write_attribute(verb, attr, value)
-                    print(f"写入成功：{verb}")
-            except ValueError:
-                print(f"----------{verb} 在 french_verbs_conjugations.csv 中读不到")
-                # conjugations = look_in_web(url)
-
-def small_fix():
-    conjugation_csv = "conjugations_to_anki.csv"
-    repertoire_csv = "french_verbs_conjugations.csv"
-    conjugation_manager = CSVAttributeManager(conjugation_csv)
-    repertoire_manager = CSVAttributeManager(repertoire_csv)
-
-    for verb in conjugation_manager.elements:
-        indice = conjugation_manager.read_attribute(verb, "indice")
-        for attr in conjugation_manager.attributes:
-            value = conjugation_manager.read_attribute(verb, attr)
+        elif verb not in repertoire_verbs:
+            print(f"----------{verb} 在 french_verbs_conjugations.csv 中读不到")
+        elif job is None:
+            print(f"=========={verb} 加入队列，url = {url}")
+            new_jobs.append((verb, url))
+        elif job[0] == FAILED:
+            print(f"=========={verb} 之前失败了 {job[2]} 次，重新加入队列，url = {url}")
+            new_jobs.append((verb, url))
+        elif job[1] != url:
+            print(f"=========={verb} 已经在队列里，网址从 {job[1]} 换成 {url}")
+            new_jobs.append((verb, url))
+        else:
+            print(f"~~~~~~~~~~{verb} 已经在队列里等待抓取，url = {url}")
+    return new_jobs
+
+
+def plan_from_repertoire(repertoire_manager, anki_verbs, base_url, url_overrides=None):
+    """
+    批量模式：目录库里还不在 anki 列表中的所有动词，按目录库的顺序，
+    返回 ([(动词, 网址)], {网址: [动词]}, [动词])。
+    url_overrides 是 {动词: 网址}，手填的网址优先。去掉重音后有些不同的动词会得到同一个网址
+    （désigner 和 designer、bâiller 和 bailler），分不清是哪个动词的页面，这些动词不加入队列，
+    放在第二个返回值里；同形动词 asseoir(1)、asseoir(2) 猜不出网址，放在第三个返回值里。
+    它们都需要在 url_overrides 里手填网址。
+    """
+    url_overrides = url_overrides or {}
+    # 目录库里的名字已经带着嘘音 h 的 * 和同形动词的 (1)、(2)，和 anki 列表里的写法一致
+    urls = {verb: url_overrides.get(verb) or verb_url(verb, base_url) for verb in repertoire_manager.get_all_elements()}
+    manual = [verb for verb, url in urls.items() if url is None and verb not in anki_verbs]
+    # 整个目录库一起比较，已经在 anki 列表中的动词也算
+    verbs_of_url = {}
+    for verb, url in urls.items():
+        if url is not None:
+            verbs_of_url.setdefault(url, []).append(verb)
+    ambiguous = {url: verbs for url, verbs in verbs_of_url.items() if len(verbs) > 1}
+    jobs = [(verb, url) for verb, url in urls.items()
+            if verb not in anki_verbs and url is not None and url not in ambiguous]
+    return jobs, ambiguous, manual
+
+
+def format_seconds(seconds):
+    """把秒数写成 时:分:秒"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def main(look_in_list=None, workers=4, rate=2.0, base_url=BESCHERELLE_URL, cache_dir=CACHE_DIR, offline=False,
+         parser=DEFAULT_PARSER, passive=False, queue_file=QUEUE_FILE, max_retries=3, batch_size=50,
+         parse_workers=None, queue_size=None, url_overrides=None, conjugation_file="conjugations_to_anki.csv",
+         repertoire_file="french_verbs_conjugations.csv"):
+    """
+    look_in_list：{动词: 网址} 手填的抓取列表，网址为空时按 verb_url 生成；
+    为 None 时是批量模式，抓取目录库 french_verbs_conjugations.csv 里所有还不在 anki 列表中的动词。
+    workers：同时抓取网页的线程数，也是并发窗口的上限；rate：每个域名每秒最多请求几次；
+    base_url：动词页面的地址前缀，测试时可以指向本地的 HTTP 服务；
+    cache_dir：网页缓存目录，为 None 时不用缓存；offline：只用缓存里的网页，不联网；
+    parser：解析网页用的解析器，见 PARSERS；passive：同时写入被动语态（passif_* 属性），不多发请求；
+    queue_file：抓取队列文件，中断后再运行会接着上次的进度；max_retries：失败的动词最多重试几次；
+    batch_size：每写入多少个动词保存一次表格并报告进度；
+    parse_workers：解析网页的进程数，默认和 CPU 核数相同，为 0 时在抓取线程里解析；
+    queue_size：最多有多少个动词已开始抓取、还没写入，默认是 workers 和 parse_workers 之和的两倍。
+    url_overrides：批量模式下 {动词: 网址} 手填的网址，用于去掉重音后和别的动词网址相同的动词。
+    conjugation_file、repertoire_file：anki 列表和目录库，以 .sqlite/.db 结尾时用 SQLiteAttributeManager。
+    """
+    conjugation_manager = open_manager(conjugation_file)
+    # 目录库只读每个动词的几列，懒加载只解析用到的行
+    repertoire_manager = open_manager(repertoire_file, lazy=True,
+                                      columns=["caracterisation", "notes", "labels"])
+    anki_verbs = set(conjugation_manager.get_all_elements())
+    repertoire_verbs = set(repertoire_manager.get_all_elements())
+
+    queue = CrawlQueue(queue_file)
+    recovered = queue.recover()
+    if recovered:
+        print(f"上次运行中断，{recovered} 个动词重新排队")
+    retried = queue.retry_failed(max_retries)
+    if retried:
+        print(f"{retried} 个之前失败的动词重新排队")
+
+    # 队列里标记完成、表格里却没有的动词（比如表格回滚过或者手工删过），放回队列重新抓
+    missing = queue.reconcile_done(anki_verbs)
+    if missing:
+        print(f"{len(missing)} 个动词在队列里已完成，但不在 anki 列表中，重新排队：{'、'.join(missing[:20])}")
+
+    # 先把要抓的动词放进队列，已经完成的不会重复加入
+    url_overrides = url_overrides or {}
+    ambiguous_verbs = set()
+    if look_in_list is None:
+        new_jobs, ambiguous, manual = plan_from_repertoire(repertoire_manager, anki_verbs, base_url, url_overrides)
+        added = queue.add_many(new_jobs)
+        # 手填的网址和队列里存的不同时更新网址，放回 pending；失败次数用完的不重置，避免每次运行都重抓
+        queue.upsert_many([(verb, url) for verb, url in new_jobs if verb in url_overrides], reset_failed=False)
+        print(f"批量模式：目录库 {len(repertoire_verbs)} 个动词，新加入队列 {added} 个")
+        for url, verbs in ambiguous.items():
+            print(f"网址相同，没有加入队列，请在 url_overrides 里手填网址：{'、'.join(verbs)}（{url}）")
+            ambiguous_verbs.update(verbs)
+        if manual:
+            print(f"同形动词猜不出网址，没有加入队列，请在 url_overrides 里手填网址：{'、'.join(manual)}")
+            ambiguous_verbs.update(manual)
+    else:
+        # 手填的列表：新网址会替换队列里的旧网址，失败过的动词重新排队
+        queue.upsert_many(plan_from_list(look_in_list, anki_verbs, repertoire_verbs, queue, base_url))
+
+    jobs = []
+    skipped = []
+    for verb, url in queue.claim():
+        if verb in anki_verbs:
+            # 上次已经写入表格，只是没来得及标记完成
+            queue.done(verb)
+        elif verb in ambiguous_verbs:
+            # 之前的运行可能已经把它放进了队列（当时的网址是猜的），同一个页面不能写给两个动词，等手填了网址再抓
+            skipped.append(verb)
+        else:
+            # 队列里存的是加入时的网址，手填的网址后来才补上的也要用新的
+            jobs.append((verb, url_overrides.get(verb, url)))
+    queue.requeue(skipped)
+
+    # 流水线：多个线程同时抓取，共用一个连接池，每个域名单独限速；
+    # 解析很耗 CPU，放在进程池里，不受 GIL 限制；写入只在当前线程，结果按队列顺序依次写入
+    # 抓过的网页存在本地缓存里，再次运行时只问服务器网页有没有变
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    # workers 只是上限，实际同时进行的请求数由 AIMDController 按延迟和限流情况自动调整
+    controller = AIMDController(initial=min(4, workers), max_window=workers)
+    client = HTTPClient(pool_size=workers, limiter=HostRateLimiter(rate), cache=cache, offline=offline,
+                        controller=controller)
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    if queue_size is None:
+        queue_size = 2 * (workers + parse_workers)
+    start_time = monotonic()
+    # 解析进程是在抓取线程里按需启动的，用 spawn 而不是 fork，避免复制正被其他线程持有的锁
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) \
+        if parse_workers else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as fetch_pool:
+            results = pipeline(jobs, client, fetch_pool, parse_pool, parser, passive, queue_size)
+            processed = 0
+            # 每 batch_size 个动词保存一次表格，保存之后再在队列里标记完成
+            while processed < len(jobs):
+                written = []
+                with conjugation_manager.batch():
+                    for (verb, url), conjugations, error in islice(results, batch_size):
+                        processed += 1
+                        if isinstance(error, CircuitOpenError):
+                            # 只是熔断器暂停了请求，不是这个动词的问题，放回队列，不算一次失败
+                            print(f"暂停请求，放回队列：{verb}")
+                            queue.requeue([verb])
+                            continue
+                        if error:
+                            # 网络错误或者页面结构不对，记在队列里，下次运行再试
+                            print(f"抓取失败：{verb}，{error}")
+                            queue.fail(verb, error)
+                            continue
+                        if not conjugations:
+                            queue.fail(verb, "页面里没有找到变位")
+                            continue
+
+                        for attr in ("caracterisation", "notes", "labels"):
+                            conjugation_manager.write_attribute(verb, attr, repertoire_manager.read_attribute(verb, attr))
+                        for attr, value in conjugations.items():
+                            # print(f"{key}: {value}")
+                            conjugation_manager.write_attribute(verb, attr, value)
+                        written.append(verb)
+                        print(f"写入成功：{verb}")
+                # 两步之间中断的话，下次运行会发现它们已在 anki 列表中，不再重抓
+                queue.done_many(written)
+
+                elapsed = monotonic() - start_time
+                speed = processed / elapsed if elapsed else 0
+                eta = (len(jobs) - processed) / speed if speed else 0
+                metrics = client.metrics()
+                print(f"进度 {processed}/{len(jobs)}，{speed:.2f} 个/秒，已用 {format_seconds(elapsed)}，"
+                      f"预计还需 {format_seconds(eta)}，并发窗口 {metrics['window']:.1f}，"
+                      f"被限流 {metrics['throttled']} 次")
+    finally:
+        if parse_pool:
+            parse_pool.shutdown(cancel_futures=True)
+    client.close()
+
+    counts = queue.counts()
+    print(f"队列：完成 {counts[DONE]}，失败 {counts[FAILED]}，等待 {counts[PENDING]}")
+    for verb, url, retries, error in queue.failures():
+        print(f"  失败 {retries} 次：{verb}（{url}）{error}")
+    queue.close()
+
+def small_fix(conjugation_file="conjugations_to_anki.csv", repertoire_file="french_verbs_conjugations.csv"):
+
+    # 只读检查，逐行流式读取，不把整个表格加载到内存
+    for verb, values in manager_class(conjugation_file).iter_rows(conjugation_file):
+        indice = values.get("indice", "")
+        for attr, value in values.items():
             if value:
                 continue
             else:
@@ -487,8 +559,7 @@ def small_fix():
 
     print("=======================")
 
-    for verb in repertoire_manager.elements:
-        label = repertoire_manager.read_attribute(verb, "labels")
+    for verb, attr, label in manager_class(repertoire_file).iter_cells(repertoire_file, columns=["labels"]):
         if label:
             continue
         else:
@@ -0,0 +1,324 @@
+import os
+import csv
+import sqlite3
+from itertools import groupby
+from contextlib import contextmanager
+
+from csv_attribute_manager import CSVAttributeManager, TOKENIZED_ATTRIBUTES
+
+# 以这些后缀结尾的文件用 SQLiteAttributeManager 打开，其余的用 CSVAttributeManager
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+def manager_class(path):
+    """按文件后缀选择属性管理器的类"""
+    return SQLiteAttributeManager if path.endswith(SQLITE_SUFFIXES) else CSVAttributeManager
+
+
+def open_manager(path, **options):
+    """
+    按文件后缀打开属性管理器：.sqlite/.sqlite3/.db 用 SQLiteAttributeManager，其余用 CSVAttributeManager。
+    options 是 CSVAttributeManager 的参数（journal、lazy、columns 等），SQLite 接受但用不到它们
+    """
+    return manager_class(path)(path, **options)
+
+
+class SQLiteAttributeManager:
+    """
+    和 CSVAttributeManager 接口相同，数据存在本地 SQLite 文件里，每次写入只改动一个单元格。
+    journal、lazy、columns 这些CSV的优化参数可以传，但不起作用：每次读写本来就只涉及用到的单元格。
+    Anki 需要的CSV用 export_csv 导出。
+    """
+
+    def __init__(self, db_file, timeout=30, journal=False, journal_limit=None, lazy=False, columns=None):
+        self.db_file = db_file
+        # 手动管理事务；WAL 模式下读写互不阻塞，多个脚本可以同时使用同一个库
+        self.conn = sqlite3.connect(db_file, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._batch_depth = 0
+        self._create_tables()
+
+    def _create_tables(self):
+        """建表：元素、属性各一张表记录顺序，单元格按 (元素, 属性) 存储"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS elements (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS attributes (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cells (
+                element TEXT NOT NULL,
+                attribute TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (element, attribute)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS elements_position ON elements (position);
+            CREATE INDEX IF NOT EXISTS attributes_position ON attributes (position);
+            CREATE INDEX IF NOT EXISTS cells_attribute ON cells (attribute);
+        """)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    @property
+    def elements(self):
+        """按添加顺序排列的所有元素"""
+        return [name for name, in self.conn.execute("SELECT name FROM elements ORDER BY position")]
+
+    @property
+    def attributes(self):
+        """按添加顺序排列的所有属性"""
+        return [name for name, in self.conn.execute("SELECT name FROM attributes ORDER BY position")]
+
+    def begin(self):
+        """开始批量写入，直到最外层的 commit() 才提交事务；嵌套的批量写入用保存点"""
+        if self._batch_depth == 0:
+            self.conn.execute("BEGIN IMMEDIATE")
+        else:
+            self.conn.execute(f"SAVEPOINT batch_{self._batch_depth}")
+        self._batch_depth += 1
+
+    def commit(self):
+        """结束批量写入，最外层提交时一次性提交事务"""
+        if self._batch_depth == 0:
+            raise ValueError("没有进行中的批量写入")
+
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute(f"RELEASE SAVEPOINT batch_{self._batch_depth}")
+
+    def rollback(self):
+        """放弃当前这一层批量写入中尚未提交的修改，嵌套时外层的批量写入继续"""
+        if self._batch_depth > 0:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.execute("ROLLBACK")
+            else:
+                self.conn.execute(f"ROLLBACK TO SAVEPOINT batch_{self._batch_depth}")
+                self.conn.execute(f"RELEASE SAVEPOINT batch_{self._batch_depth}")
+
+    def compact(self):
+        """把 WAL 里的修改合并回数据库文件，对应 CSVAttributeManager 把日志合并回CSV"""
+        if self._batch_depth > 0:
+            raise ValueError("批量写入进行中，不能合并日志")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def refresh(self):
+        """每次读取都直接查数据库，其他进程提交的修改总是能读到，这里不需要做什么"""
+
+    @contextmanager
+    def batch(self):
+        """批量写入的上下文管理器：正常退出时提交，出错时回滚"""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def _has_element(self, element):
+        return self.conn.execute("SELECT 1 FROM elements WHERE name = ?", (element,)).fetchone() is not None
+
+    def _has_attribute(self, attribute):
+        return self.conn.execute("SELECT 1 FROM attributes WHERE name = ?", (attribute,)).fetchone() is not None
+
+    def _insert(self, table, names):
+        """把不存在的元素或属性追加到末尾"""
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {table} (name, position) "
+            f"VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM {table}))",
+            [(name,) for name in names])
+
+    def read_attribute(self, element, attribute):
+        """读取指定元素的指定属性值"""
+        if not self._has_element(element):
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        if not self._has_attribute(attribute):
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        row = self.conn.execute("SELECT value FROM cells WHERE element = ? AND attribute = ?",
+                                (element, attribute)).fetchone()
+        return row[0] if row else ''
+
+    def write_attribute(self, element, attribute, value):
+        """写入指定元素的指定属性值"""
+        self.write_attributes(element, {attribute: value})
+
+    def write_attributes(self, element, values):
+        """一次写入一个元素的多个属性值"""
+        with self.batch():
+            # 如果元素或属性不存在，先添加
+            self._insert("elements", [element])
+            self._insert("attributes", values.keys())
+            self.conn.executemany(
+                "INSERT INTO cells (element, attribute, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (element, attribute) DO UPDATE SET value = excluded.value",
+                [(element, attr, str(value)) for attr, value in values.items()])
+
+    def add_element(self, element):
+        """添加新元素"""
+        if self._has_element(element):
+            raise ValueError(f"元素 '{element}' 已存在")
+
+        with self.batch():
+            self._insert("elements", [element])
+
+    def add_attribute(self, attribute):
+        """添加新属性"""
+        if self._has_attribute(attribute):
+            raise ValueError(f"属性 '{attribute}' 已存在")
+
+        with self.batch():
+            self._insert("attributes", [attribute])
+
+    def get_all_elements(self):
+        """获取所有元素列表"""
+        return self.elements
+
+    def get_all_attributes(self):
+        """获取所有属性列表"""
+        return self.attributes
+
+    def get_element_data(self, element):
+        """获取元素的所有属性数据"""
+        if not self._has_element(element):
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        data = {attr: '' for attr in self.attributes}
+        data.update(self.conn.execute("SELECT attribute, value FROM cells WHERE element = ?", (element,)))
+        return data
+
+    @classmethod
+    def iter_rows(cls, db_file, columns=None):
+        """逐行读取，返回 (元素, {属性: 值})，按元素的添加顺序；columns 是要返回的属性列表，默认返回全部属性"""
+        if not os.path.exists(db_file):
+            return
+        manager = cls(db_file)
+        try:
+            wanted = [attr for attr in manager.attributes if columns is None or attr in columns]
+            cells = manager.conn.execute(
+                "SELECT elements.name, cells.attribute, cells.value FROM elements "
+                "LEFT JOIN cells ON cells.element = elements.name ORDER BY elements.position")
+            for element, group in groupby(cells, key=lambda cell: cell[0]):
+                values = dict.fromkeys(wanted, '')
+                values.update((attr, value) for _, attr, value in group if attr in values)
+                yield element, values
+        finally:
+            manager.close()
+
+    @classmethod
+    def iter_cells(cls, db_file, columns=None):
+        """逐个单元格读取，返回 (元素, 属性, 值)"""
+        for element, values in cls.iter_rows(db_file, columns):
+            for attr, value in values.items():
+                yield element, attr, value
+
+    def _column(self, attribute):
+        """取出一整列：{元素: 值}，没有存储的单元格为空字符串"""
+        values = dict.fromkeys(self.elements, '')
+        values.update(self.conn.execute("SELECT element, value FROM cells WHERE attribute = ?", (attribute,)))
+        return values
+
+    def select(self, where=None, columns=None):
+        """批量查询，用法和 CSVAttributeManager.select 相同"""
+        attributes = self.attributes
+        where = where or {}
+        columns = attributes if columns is None else columns
+        for attribute in list(where) + list(columns):
+            if attribute not in attributes:
+                raise ValueError(f"属性 '{attribute}' 不存在")
+
+        elements = self.elements
+        for attribute, value in where.items():
+            column = self._column(attribute)
+            if attribute in TOKENIZED_ATTRIBUTES:
+                elements = [e for e in elements if value in (column[e].split() or [''])]
+            else:
+                elements = [e for e in elements if column[e] == value]
+
+        data = {element: dict.fromkeys(columns, '') for element in elements}
+        for attribute in columns:
+            column = self._column(attribute)
+            for element in elements:
+                data[element][attribute] = column[element]
+        return data
+
+    def value_counts(self, attribute):
+        """统计某个属性每个取值对应的元素个数，多标签属性按单个标签统计"""
+        if not self._has_attribute(attribute):
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        counts = {}
+        for value in self._column(attribute).values():
+            keys = (value.split() or ['']) if attribute in TOKENIZED_ATTRIBUTES else [value]
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def delete_element(self, element):
+        """删除元素"""
+        if not self._has_element(element):
+            raise ValueError(f"元素 '{element}' 不存在")
+
+        with self.batch():
+            self.conn.execute("DELETE FROM cells WHERE element = ?", (element,))
+            self.conn.execute("DELETE FROM elements WHERE name = ?", (element,))
+
+    def delete_attribute(self, attribute):
+        """删除属性"""
+        if not self._has_attribute(attribute):
+            raise ValueError(f"属性 '{attribute}' 不存在")
+
+        with self.batch():
+            self.conn.execute("DELETE FROM cells WHERE attribute = ?", (attribute,))
+            self.conn.execute("DELETE FROM attributes WHERE name = ?", (attribute,))
+
+    def import_csv(self, csv_file):
+        """把 CSVAttributeManager 格式的CSV文件合并进数据库，已有的单元格会被覆盖，空值不单独存储"""
+        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if not header:
+                return
+
+            # 第一行是属性名（第一列为空）
+            attributes = header[1:]
+            with self.batch():
+                self._insert("attributes", attributes)
+                for row in reader:
+                    if not row:  # 跳过空行
+                        continue
+                    element = row[0]
+                    self._insert("elements", [element])
+                    cells = list(zip(attributes, row[1:]))
+                    self.conn.executemany(
+                        "INSERT INTO cells (element, attribute, value) VALUES (?, ?, ?) "
+                        "ON CONFLICT (element, attribute) DO UPDATE SET value = excluded.value",
+                        [(element, attr, value) for attr, value in cells if value])
+                    self.conn.executemany(
+                        "DELETE FROM cells WHERE element = ? AND attribute = ?",
+                        [(element, attr) for attr, value in cells if not value])
+
+    def export_csv(self, csv_file):
+        """导出成 CSVAttributeManager 格式的CSV文件，例如生成给 Anki 导入的 conjugations_to_anki.csv"""
+        attributes = self.attributes
+        col_index = {attr: col for col, attr in enumerate(attributes)}
+        rows = {element: [element] + [''] * len(attributes) for element in self.elements}
+        for element, attribute, value in self.conn.execute("SELECT element, attribute, value FROM cells"):
+            rows[element][col_index[attribute] + 1] = value
+
+        tmp_file = f"{csv_file}.tmp"
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow([''] + attributes)
+            writer.writerows(rows.values())
+        os.replace(tmp_file, csv_file)